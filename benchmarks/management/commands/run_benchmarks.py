@@ -0,0 +1,80 @@
+import json
+import platform
+import shutil
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from benchmarks.runner import BenchmarkRunner
+from benchmarks.seed import Seed
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the upload, queue, assignment and review views.
+
+    Must be run with ``--settings=benchmarks.settings``, which points the
+    project at a throwaway database, in-memory channel layer and cache.
+    The results are printed, or written to ``--output``, as JSON.
+    """
+
+    help = "Измеряет производительность процесса обработки документов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--query-samples",
+            type=int,
+            default=5,
+            help="Sequential requests per scenario used to count queries.",
+        )
+        parser.add_argument("--employees", type=int, default=10)
+        parser.add_argument("--assistants", type=int, default=5)
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        if "benchmarks" not in settings.INSTALLED_APPS:
+            raise CommandError("Run with --settings=benchmarks.settings.")
+
+        call_command("migrate", verbosity=0, interactive=False)
+        documents = options["requests"] + options["query_samples"]
+        seed = Seed(
+            employees=options["employees"],
+            assistants=options["assistants"],
+            documents=documents,
+        )
+        try:
+            results = BenchmarkRunner(
+                seed,
+                requests=options["requests"],
+                concurrency=options["concurrency"],
+                query_samples=options["query_samples"],
+            ).run()
+        finally:
+            seed.delete()
+            shutil.rmtree(settings.BENCHMARK_DIR, ignore_errors=True)
+
+        report = {
+            "created_at": timezone.now().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "parameters": {
+                key: options[key]
+                for key in ("requests", "concurrency", "query_samples", "employees", "assistants")
+            },
+            "scenarios": results,
+        }
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,202 @@
+import asyncio
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from benchmarks.seed import make_pdf
+from common.stats import percentile
+
+
+class Scenario:
+    """
+    A kind of request of the document workflow.
+
+    Subclasses implement ``get_request``, which returns the user making the
+    ``index``-th request and the request itself. Requests with different
+    indexes must not depend on each other, e.g. every assignment uses
+    another document.
+    """
+
+    name = None
+    method = "get"
+    expected_status = 200
+
+    def __init__(self, seed):
+        self.seed = seed
+
+    def get_request(self, index):
+        """
+        Returns:
+            tuple[User, str, dict | None]: The user, the path and the POST data.
+        """
+        raise NotImplementedError
+
+
+class UploadScenario(Scenario):
+    name = "upload_document"
+    method = "post"
+    expected_status = 302
+
+    def get_request(self, index):
+        data = {
+            "document_type": "Benchmark",
+            "mfo": "123456789",
+            "message": "benchmark",
+            "pdf_file": SimpleUploadedFile(
+                "benchmark.pdf", make_pdf(index), content_type="application/pdf"
+            ),
+        }
+        employees = self.seed.employees
+        return employees[index % len(employees)], reverse("documents:upload_document"), data
+
+
+class ListScenario(Scenario):
+    role = None
+
+    def __init__(self, seed, name, url_name, role):
+        super().__init__(seed)
+        self.name = name
+        self.url_name = url_name
+        self.role = role
+
+    def get_request(self, index):
+        users = getattr(self.seed, self.role)
+        return users[index % len(users)], reverse(self.url_name), None
+
+
+class AssignScenario(Scenario):
+    name = "assign_document"
+    method = "post"
+    expected_status = 302
+
+    def get_request(self, index):
+        managers = self.seed.managers
+        assistants = self.seed.assistants
+        document_id = self.seed.unassigned[index]
+        data = {"assistant": assistants[index % len(assistants)].id, "version": 0}
+        path = reverse("documents:assign_document", args=[document_id])
+        return managers[index % len(managers)], path, data
+
+
+class ReviewScenario(Scenario):
+    name = "review_document"
+    method = "post"
+    expected_status = 302
+
+    def get_request(self, index):
+        assistants = self.seed.assistants
+        assistant = assistants[index % len(assistants)]
+        document_id = self.seed.assigned[assistant.id][index // len(assistants)]
+        path = reverse("documents:assistant_review_document", args=[document_id])
+        return assistant, path, {"action": "accept", "version": 0}
+
+
+def get_scenarios(seed):
+    return [
+        UploadScenario(seed),
+        ListScenario(seed, "employee_documents", "documents:employee_documents", "employees"),
+        ListScenario(seed, "manager_documents", "documents:manager_documents", "managers"),
+        ListScenario(seed, "assistant_documents", "documents:assistant_documents", "assistants"),
+        AssignScenario(seed),
+        ReviewScenario(seed),
+    ]
+
+
+class BenchmarkRunner:
+    """
+    Drives the scenarios through the ASGI handler with ``AsyncClient``.
+
+    Latency and throughput are measured with ``requests`` concurrent requests
+    per scenario, at most ``concurrency`` in flight. Queries per request are
+    counted afterwards with ``query_samples`` sequential requests through the
+    test ``Client``, since queries cannot be attributed to a request while
+    several run at once.
+    """
+
+    def __init__(self, seed, requests=200, concurrency=10, query_samples=5):
+        self.seed = seed
+        self.requests = requests
+        self.concurrency = concurrency
+        self.query_samples = query_samples
+        self._async_clients = {}
+        self._sync_clients = {}
+
+    def _get_client(self, clients, client_class, user):
+        if user.id not in clients:
+            client = client_class()
+            client.force_login(user)
+            clients[user.id] = client
+        return clients[user.id]
+
+    def run(self):
+        """
+        Run every scenario.
+
+        Returns:
+            dict: The results of each scenario, keyed by scenario name.
+        """
+        results = {}
+        for scenario in get_scenarios(self.seed):
+            # Build the requests first, so that no query of the run is spent
+            # logging users in.
+            requests = [
+                self._prepare(self._async_clients, AsyncClient, scenario, index)
+                for index in range(self.requests)
+            ]
+            elapsed, latencies, errors = asyncio.run(self._run_async(scenario, requests))
+            queries = self._count_queries(scenario)
+            latencies.sort()
+            results[scenario.name] = {
+                "requests": len(latencies),
+                "errors": errors,
+                "elapsed_s": round(elapsed, 3),
+                "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+                "mean_ms": round(sum(latencies) / len(latencies), 2),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "queries_per_request": queries,
+            }
+        return results
+
+    def _prepare(self, clients, client_class, scenario, index):
+        user, path, data = scenario.get_request(index)
+        return self._get_client(clients, client_class, user), path, data
+
+    async def _run_async(self, scenario, requests):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def send(client, path, data):
+            async with semaphore:
+                started = time.perf_counter()
+                if scenario.method == "post":
+                    response = await client.post(path, data)
+                else:
+                    response = await client.get(path)
+                latency = (time.perf_counter() - started) * 1000
+                return latency, response.status_code != scenario.expected_status
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(send(*request) for request in requests))
+        elapsed = time.perf_counter() - started
+        return elapsed, [latency for latency, _ in results], sum(
+            error for _, error in results
+        )
+
+    def _count_queries(self, scenario):
+        counts = []
+        for index in range(self.requests, self.requests + self.query_samples):
+            client, path, data = self._prepare(
+                self._sync_clients, Client, scenario, index
+            )
+            with CaptureQueriesContext(connection) as queries:
+                if scenario.method == "post":
+                    client.post(path, data)
+                else:
+                    client.get(path)
+            counts.append(len(queries))
+        return round(sum(counts) / len(counts), 2) if counts else None
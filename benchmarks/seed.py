@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from documents.models import Document
+
+
+USERNAME_PREFIX = "bench_"
+
+# The smallest file accepted by DocumentForm; a counter is appended to make
+# every upload unique, duplicates are rejected by their SHA-256.
+PDF_CONTENT = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+
+
+def make_pdf(index):
+    return PDF_CONTENT + f"% {index}\n".encode()
+
+
+class Seed:
+    """
+    Synthetic users and documents for a benchmark run.
+
+    Attributes:
+        employees, managers, assistants (list[User]): The seeded users.
+        unassigned (list[int]): Pending, unassigned documents for the
+            assignment scenario.
+        assigned (dict[int, list[int]]): Pending documents assigned to each
+            assistant, for the review scenario.
+    """
+
+    def __init__(self, employees=10, managers=2, assistants=5, documents=1000):
+        """
+        Create the users and documents.
+
+        Args:
+            employees, managers, assistants (int): The number of users of each
+                role.
+            documents (int): The number of unassigned documents, and of
+                documents assigned to every assistant, to create.
+        """
+        User = get_user_model()
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        users = [
+            User(username=f"{USERNAME_PREFIX}{role}_{i}", role=role)
+            for role, count in (
+                (User.ROLE_EMPLOYEE, employees),
+                (User.ROLE_MANAGER, managers),
+                (User.ROLE_ASSISTANT, assistants),
+            )
+            for i in range(count)
+        ]
+        for user in users:
+            user.set_password("benchmark")
+        User.objects.bulk_create(users)
+        seeded = User.objects.filter(username__startswith=USERNAME_PREFIX).order_by("id")
+        self.employees = [user for user in seeded if user.role == User.ROLE_EMPLOYEE]
+        self.managers = [user for user in seeded if user.role == User.ROLE_MANAGER]
+        self.assistants = [user for user in seeded if user.role == User.ROLE_ASSISTANT]
+
+        pdf_name = default_storage.save("documents/benchmark.pdf", ContentFile(PDF_CONTENT))
+        # Unassigned documents first, then ``documents`` for each assistant,
+        # handed out round-robin so every assistant gets the same share.
+        owners = [None] * documents + [
+            self.assistants[i % assistants] for i in range(documents * assistants)
+        ]
+        Document.objects.bulk_create(
+            [
+                Document(
+                    employee=self.employees[i % employees],
+                    assigned_to=assistant,
+                    pdf_file=pdf_name,
+                    mfo="123456789",
+                    document_type=f"Benchmark {i}",
+                    message="benchmark",
+                )
+                for i, assistant in enumerate(owners)
+            ],
+            batch_size=500,
+        )
+        self.unassigned = list(
+            Document.objects.filter(
+                employee__username__startswith=USERNAME_PREFIX,
+                assigned_to__isnull=True,
+            )
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        self.assigned = {assistant.id: [] for assistant in self.assistants}
+        for document_id, assistant_id in (
+            Document.objects.filter(assigned_to__in=self.assistants)
+            .order_by("id")
+            .values_list("id", "assigned_to_id")
+        ):
+            self.assigned[assistant_id].append(document_id)
+
+    def delete(self):
+        """
+        Delete the seeded users, with their documents and notifications.
+        """
+        get_user_model().objects.filter(username__startswith=USERNAME_PREFIX).delete()
@@ -0,0 +1,53 @@
+"""
+Settings for the document workflow benchmark.
+
+Usage::
+
+    python manage.py run_benchmarks --settings=benchmarks.settings
+
+Everything runs in-process against local stand-ins: a throwaway SQLite
+database (or the local PostgreSQL database named by ``BENCHMARK_PG_NAME``),
+the in-memory channel layer and cache, and a temporary media directory.
+"""
+import os
+import tempfile
+
+from config.settings import *  # noqa: F401,F403
+from config.settings import INSTALLED_APPS
+
+
+BENCHMARK_DIR = tempfile.mkdtemp(prefix="dms-benchmark-")
+
+DEBUG = False
+
+INSTALLED_APPS = INSTALLED_APPS + ["benchmarks"]
+
+if os.environ.get("BENCHMARK_PG_NAME"):
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ["BENCHMARK_PG_NAME"],
+            "USER": os.environ.get("BENCHMARK_PG_USER", "postgres"),
+            "PASSWORD": os.environ.get("BENCHMARK_PG_PASSWORD", ""),
+            "HOST": os.environ.get("BENCHMARK_PG_HOST", "localhost"),
+            "PORT": os.environ.get("BENCHMARK_PG_PORT", "5432"),
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.path.join(BENCHMARK_DIR, "db.sqlite3"),
+        }
+    }
+
+CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+MEDIA_ROOT = os.path.join(BENCHMARK_DIR, "media")
+
+# Seeding hashes a password per user.
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+DOCUMENT_PREVIEWS_ENABLED = False
@@ -0,0 +1,183 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+
+
+def estimate_count(queryset):
+    """
+    Returns the number of rows of a queryset as estimated by the planner.
+
+    On PostgreSQL the estimate comes from ``EXPLAIN`` and costs no table
+    scan. Other databases fall back to an exact ``COUNT(*)``.
+
+    Args:
+        queryset (QuerySet): The queryset to count.
+
+    Returns:
+        int: The estimated number of rows.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPage:
+    """
+    A page of results produced by ``KeysetPaginationMixin``.
+
+    Mirrors the parts of ``django.core.paginator.Page`` used by templates.
+    """
+
+    is_keyset = True
+
+    def __init__(
+        self,
+        object_list,
+        has_next,
+        has_previous,
+        next_querystring=None,
+        previous_querystring=None,
+        total_count=None,
+        total_is_estimate=False,
+    ):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_querystring = next_querystring
+        self.previous_querystring = previous_querystring
+        self.total_count = total_count
+        self.total_is_estimate = total_is_estimate
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginationMixin:
+    """
+    A mixin for list views paginating with a cursor instead of OFFSET/LIMIT.
+
+    Rows are ordered by ``keyset_fields`` in descending order and a page is
+    selected with a range condition on those fields, so every page costs the
+    same index range scan and no ``COUNT(*)`` is needed. The cursor of the
+    next page is passed in the ``after`` query parameter and the cursor of
+    the previous page in ``before``.
+
+    ``total_count`` controls the total shown next to the page links: ``None``
+    hides it, ``"estimate"`` uses the planner estimate and ``"exact"`` runs
+    ``COUNT(*)``.
+    """
+
+    keyset_fields = ("created_at", "id")
+    total_count = None
+
+    def paginate_queryset(self, queryset, page_size):
+        unfiltered = queryset
+        after = self.decode_cursor(self.request.GET.get("after"))
+        before = self.decode_cursor(self.request.GET.get("before"))
+        descending = [f"-{field}" for field in self.keyset_fields]
+
+        if before is not None:
+            rows = list(
+                queryset.filter(self.keyset_filter(before, "gt"))
+                .order_by(*self.keyset_fields)[: page_size + 1]
+            )
+            has_previous = len(rows) > page_size
+            rows = rows[:page_size][::-1]
+            has_next = True
+        else:
+            if after is not None:
+                queryset = queryset.filter(self.keyset_filter(after, "lt"))
+            rows = list(queryset.order_by(*descending)[: page_size + 1])
+            has_next = len(rows) > page_size
+            rows = rows[:page_size]
+            has_previous = after is not None
+
+        page = KeysetPage(rows, has_next=False, has_previous=False)
+        if rows:
+            page = KeysetPage(
+                rows,
+                has_next=has_next,
+                has_previous=has_previous,
+                next_querystring=self.get_page_querystring("after", rows[-1]),
+                previous_querystring=self.get_page_querystring("before", rows[0]),
+            )
+        if self.total_count:
+            if self.total_count == "estimate":
+                page.total_count = estimate_count(unfiltered)
+                page.total_is_estimate = True
+            else:
+                page.total_count = unfiltered.count()
+        return None, page, rows, page.has_other_pages()
+
+    def keyset_filter(self, values, lookup):
+        """
+        Builds the condition selecting rows past a cursor.
+
+        Args:
+            values (list): The cursor values, one per keyset field.
+            lookup (str): ``"lt"`` for rows after the cursor in descending
+                order, ``"gt"`` for rows before it.
+
+        Returns:
+            Q: The lexicographic comparison of the keyset fields.
+        """
+        condition = Q()
+        for index, field in enumerate(self.keyset_fields):
+            equal = dict(zip(self.keyset_fields[:index], values[:index]))
+            condition |= Q(**equal, **{f"{field}__{lookup}": values[index]})
+        return condition
+
+    def get_page_querystring(self, direction, obj):
+        params = self.request.GET.copy()
+        for key in ("after", "before", "page"):
+            params.pop(key, None)
+        params[direction] = self.encode_cursor(obj)
+        return params.urlencode()
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, field) for field in self.keyset_fields]
+        # Full precision isoformat, DjangoJSONEncoder truncates microseconds.
+        data = json.dumps(values, default=lambda value: value.isoformat()).encode()
+        return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """
+        Returns the keyset values stored in a cursor, or None if the cursor
+        is missing or invalid.
+        """
+        if not cursor:
+            return None
+        try:
+            data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(data)
+            if len(values) != len(self.keyset_fields):
+                return None
+            opts = self.model._meta
+            return [
+                opts.get_field(field).to_python(value)
+                for field, value in zip(self.keyset_fields, values)
+            ]
+        except (ValueError, TypeError, AttributeError, ValidationError):
+            return None
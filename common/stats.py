@@ -0,0 +1,15 @@
+def percentile(sorted_values, percent):
+    """
+    Returns the nearest-rank percentile of already sorted values.
+
+    Args:
+        sorted_values (list[float]): The values, in ascending order.
+        percent (float): The percentile, from 0 to 100.
+
+    Returns:
+        float: The value at the percentile, or 0.0 if there are no values.
+    """
+    if not sorted_values:
+        return 0.0
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
@@ -0,0 +1,70 @@
+class TrackChangesMixin:
+    """
+    Model mixin remembering the values of the ``tracked_fields`` as they
+    were loaded from the database, so that signals and ``save`` overrides
+    can tell what changed without re-reading the row.
+
+    The values are taken in ``from_db`` and ``refresh_from_db`` and reset
+    after every ``save``. Code writing an instance's values with
+    ``QuerySet.update`` must call ``reset_tracking`` itself.
+
+    Usage::
+
+        class RoleRequest(TrackChangesMixin, models.Model):
+            tracked_fields = ("is_approved",)
+
+        if role_request.has_changed("is_approved"):
+            old = role_request.previous("is_approved")
+    """
+
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.reset_tracking()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.reset_tracking(fields)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.reset_tracking(kwargs.get("update_fields"))
+
+    def reset_tracking(self, fields=None):
+        """
+        Remembers the current values of the tracked fields, or of those in
+        ``fields``, as the loaded ones. Deferred fields are skipped until
+        they are loaded.
+
+        Called after loads and saves; call it after writing the values of
+        an instance with ``QuerySet.update``.
+        """
+        loaded = self.__dict__.setdefault("_loaded_values", {})
+        for name in self.tracked_fields:
+            attname = self._meta.get_field(name).attname
+            if fields is not None and name not in fields and attname not in fields:
+                continue
+            if attname in self.__dict__:
+                loaded[name] = self.__dict__[attname]
+
+    def has_changed(self, name):
+        """
+        Returns whether a tracked field differs from its loaded value.
+
+        Fields of unsaved instances count as changed. Deferred fields never
+        loaded count as unchanged, their previous value being unknown.
+        """
+        loaded = self.__dict__.get("_loaded_values", {})
+        if name not in loaded:
+            return self._state.adding
+        return getattr(self, self._meta.get_field(name).attname) != loaded[name]
+
+    def previous(self, name):
+        """
+        Returns the loaded value of a tracked field, or None if it was not
+        loaded from the database.
+        """
+        return self.__dict__.get("_loaded_values", {}).get(name)
@@ -30,18 +30,30 @@ LOCAL_APPS = [
     "users",
     "documents",
     "notifications",
+    "monitoring",
 ]
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 AUTH_USER_MODEL = "users.User"
 
+AUTHENTICATION_BACKENDS = ["users.backends.CachedModelBackend"]
+
+# Sessions and the users they belong to are read from the cache, so an
+# authenticated request or websocket handshake needs no query to resolve the
+# user. Set AUTH_USER_CACHE_TIMEOUT to 0 to always load the user.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
+
 
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap4"
 CRISPY_TEMPLATE_PACK = "bootstrap4"
 
 
 MIDDLEWARE = [
+    "monitoring.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "monitoring.middleware.QueryBudgetMiddleware",
+    "monitoring.middleware.ProfilingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -55,6 +67,26 @@ MIDDLEWARE = [
 ROOT_URLCONF = "config.urls"
 
 
+# See monitoring.middleware.QueryBudgetMiddleware. Turn QUERY_BUDGET_STRICT on
+# in tests to fail on views exceeding their query_budget or running N+1 queries.
+QUERY_BUDGET_STRICT = False
+QUERY_REPEAT_THRESHOLD = 5
+
+# Fraction of the requests and websocket handlers profiled by
+# monitoring.profiling, shown at /admin/profiling/. 0 turns profiling off.
+PROFILING_SAMPLE_RATE = 0
+PROFILING_INTERVAL = 0.005
+PROFILING_MAX_DEPTH = 64
+PROFILING_MAX_STACKS = 500
+PROFILING_MAX_VIEWS = 100
+
+# Metrics exported at /metrics. Each metric keeps at most METRICS_MAX_SERIES
+# label combinations. Scrapers authenticate with "Authorization: Bearer
+# <METRICS_TOKEN>"; without a token only staff users can read the metrics.
+METRICS_MAX_SERIES = 500
+METRICS_TOKEN = ""
+
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -141,3 +173,47 @@ CHANNEL_LAYERS = {
     },
 }
 
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://localhost:6379/1",
+    },
+}
+
+
+NOTIFICATIONS_UNREAD_COUNT_TIMEOUT = 24 * 60 * 60
+# Read notifications older than this are removed by prune_notifications.
+NOTIFICATIONS_RETENTION_DAYS = 90
+# Websocket clients connecting with ?batch=1 get the notifications of this
+# window, in seconds, in one frame, with at most this many notifications
+# buffered per connection; older ones are dropped.
+NOTIFICATIONS_WS_BATCH_WINDOW = 0.1
+NOTIFICATIONS_WS_BUFFER_SIZE = 100
+# Batching clients with this many unacknowledged frames are sent nothing
+# more, and are disconnected after staying behind for this many seconds.
+NOTIFICATIONS_WS_MAX_UNACKED = 5
+NOTIFICATIONS_WS_STALL_TIMEOUT = 30
+# Maximum number of missed notifications replayed on websocket reconnect.
+NOTIFICATIONS_REPLAY_LIMIT = 50
+
+
+# Set DOCUMENT_PREVIEWS_ENABLED to False to generate previews with the
+# generate_document_previews command only.
+DOCUMENT_PREVIEWS_ENABLED = True
+DOCUMENT_PREVIEW_WORKERS = 2
+DOCUMENT_PREVIEW_TIMEOUT = 30
+DOCUMENT_PREVIEW_THUMBNAIL_WIDTH = 200
+DOCUMENT_PREVIEW_TEXT_LIMIT = 100_000
+
+
+# How document files are sent: "python" streams them from Django,
+# "x-accel-redirect" (nginx) and "x-sendfile" (Apache) leave it to the proxy.
+DOCUMENT_DOWNLOAD_MODE = "python"
+DOCUMENT_DOWNLOAD_ACCEL_PREFIX = "/protected-media/"
+
+
+# base.html sends a heartbeat every 30 seconds.
+PRESENCE_TTL = 90
+PRESENCE_FLUSH_INTERVAL = 5
+
@@ -1,18 +1,29 @@
+import os
+
 from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
 from django.conf import settings
 from django.conf.urls.static import static
 
+from monitoring.views import metrics_view, profiling_view
+
 
 urlpatterns = [
+    path('admin/profiling/', profiling_view, name='profiling'),
     path('admin/', admin.site.urls),
     path('', TemplateView.as_view(template_name='index.html'), name='index'),
     path('users/', include('users.urls', namespace='users')),
     path('documents/', include('documents.urls', namespace='documents')),
     path('notifications/', include('notifications.urls', namespace='notifications')),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Document files and thumbnails are only served through the
+    # permission-checked views of the documents app.
+    urlpatterns += static(
+        settings.MEDIA_URL + "avatars/",
+        document_root=os.path.join(settings.MEDIA_ROOT, "avatars/"),
+    )
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
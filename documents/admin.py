@@ -1,5 +1,34 @@
 from django.contrib import admin
-from .models import Document
+from .models import Document, DocumentEvent
 
 
-admin.site.register(Document)
+@admin.register(Document)
+class DocumentAdmin(admin.ModelAdmin):
+    """
+    The status is read-only: it changes through ``documents.transitions``,
+    which checks the transition, bumps the version and records the events.
+    """
+
+    readonly_fields = ("status",)
+
+
+@admin.register(DocumentEvent)
+class DocumentEventAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the event log, which the statistics rollups are
+    derived from.
+    """
+
+    list_display = ("document", "event_type", "actor", "assistant", "created_at")
+    list_filter = ("event_type",)
+    list_select_related = ("document", "actor", "assistant")
+    raw_id_fields = ("document", "actor", "assistant")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
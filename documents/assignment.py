@@ -0,0 +1,130 @@
+import heapq
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+
+from documents.models import Document
+from documents.transitions import bulk_transition
+from monitoring.queries import allow_repeated_queries
+from notifications.utils import NotificationService
+
+
+def get_assistants_with_load():
+    """
+    Returns the assistants annotated with ``load``, the number of pending
+    documents assigned to each of them, computed in a single query.
+    """
+    return (
+        get_user_model()
+        .objects.filter(role="assistant", is_active=True)
+        .annotate(
+            load=Count(
+                "assigned_documents",
+                filter=Q(assigned_documents__status=Document.STATUS_PENDING),
+            )
+        )
+        .order_by("load", "id")
+    )
+
+
+class AssignmentEngine:
+    """
+    Assigns pending, unassigned documents to the least-loaded assistants.
+
+    Documents are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+    several engines (the periodic command and managers pressing the button)
+    can drain the queue concurrently without assigning a document twice.
+    Loads are read once per batch, so concurrent batches may balance
+    slightly worse than a single one.
+    """
+
+    def __init__(self, service=None, batch_size=100):
+        """
+        Initialize the engine.
+
+        Args:
+            service (NotificationService, optional): The service used to
+                queue notifications. Defaults to a new ``NotificationService``.
+            batch_size (int): The maximum number of documents claimed per batch.
+        """
+        self.service = service or NotificationService()
+        self.batch_size = batch_size
+
+    def assign_batch(self):
+        """
+        Claim and assign one batch of pending documents.
+
+        Each assistant is notified once per batch, after the transaction
+        commits, through the notification outbox.
+
+        Returns:
+            dict[int, list[int]]: The ids of the assigned documents, keyed by
+            the id of the assistant.
+        """
+        with transaction.atomic():
+            loads = [
+                (assistant.load, assistant.id)
+                for assistant in get_assistants_with_load()
+            ]
+            if not loads:
+                return {}
+            documents = list(
+                Document.objects.select_for_update(skip_locked=True)
+                .filter(status=Document.STATUS_PENDING, assigned_to__isnull=True)
+                .order_by("created_at", "id")
+                .only("id", "document_type", "assigned_to_id", "assigned_at")[
+                    : self.batch_size
+                ]
+            )
+            if not documents:
+                return {}
+
+            heapq.heapify(loads)
+            assigned = defaultdict(list)
+            for document in documents:
+                load, assistant_id = heapq.heappop(loads)
+                assigned[assistant_id].append(document)
+                heapq.heappush(loads, (load + 1, assistant_id))
+
+            # One transition per assistant, bounded by the number of
+            # assistants rather than of documents.
+            with allow_repeated_queries():
+                for assistant_id, batch in sorted(assigned.items()):
+                    bulk_transition(
+                        batch,
+                        Document.STATUS_PENDING,
+                        Document.STATUS_PENDING,
+                        assigned_to_id=assistant_id,
+                    )
+            self.service.enqueue_each(
+                {
+                    assistant_id: self.get_message(batch)
+                    for assistant_id, batch in assigned.items()
+                }
+            )
+        return {
+            assistant_id: [document.id for document in batch]
+            for assistant_id, batch in assigned.items()
+        }
+
+    def assign_all(self):
+        """
+        Assign batches until the queue is empty.
+
+        Returns:
+            int: The number of assigned documents.
+        """
+        total = 0
+        while True:
+            assigned = sum(len(ids) for ids in self.assign_batch().values())
+            total += assigned
+            if assigned < self.batch_size:
+                return total
+
+    @staticmethod
+    def get_message(documents):
+        if len(documents) == 1:
+            return f"Вам назначен документ: {documents[0].document_type}"
+        return f"Вам назначено документов: {len(documents)}"
@@ -0,0 +1,105 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from documents.assignment import AssignmentEngine
+from documents.models import Document
+from documents.transitions import bulk_transition
+from notifications.utils import NotificationService
+
+
+REVIEW_MESSAGES = {
+    Document.STATUS_ACCEPTED: (
+        "Ваш документ был принят.",
+        "Ваши документы были приняты: {count}.",
+    ),
+    Document.STATUS_REJECTED: (
+        "Ваш документ был отклонен.",
+        "Ваши документы были отклонены: {count}.",
+    ),
+}
+
+
+def _lock_pending(queryset, document_ids, fields):
+    return list(
+        queryset.select_for_update()
+        .filter(id__in=document_ids, status=Document.STATUS_PENDING)
+        .order_by("id")
+        .only("id", "assigned_to_id", "assigned_at", *fields)
+    )
+
+
+def bulk_assign(document_ids, assistant_id, actor=None, service=None):
+    """
+    Assigns several pending, unassigned documents to an assistant.
+
+    Documents that were assigned or reviewed in the meantime are skipped.
+    The assistant receives a single notification.
+
+    Args:
+        document_ids (Iterable[int]): The ids of the documents.
+        assistant_id (int): The id of the assistant.
+        actor (User, optional): The user making the change.
+        service (NotificationService, optional): The service used to queue
+            the notification.
+
+    Returns:
+        int: The number of assigned documents.
+    """
+    service = service or NotificationService()
+    with transaction.atomic():
+        documents = _lock_pending(
+            Document.objects.filter(assigned_to__isnull=True),
+            document_ids,
+            ["document_type"],
+        )
+        if not documents:
+            return 0
+        bulk_transition(
+            documents,
+            Document.STATUS_PENDING,
+            Document.STATUS_PENDING,
+            actor=actor,
+            assigned_to_id=assistant_id,
+        )
+        service.enqueue(assistant_id, AssignmentEngine.get_message(documents))
+    return len(documents)
+
+
+def bulk_review(queryset, document_ids, status, actor=None, service=None):
+    """
+    Accepts or rejects several pending documents at once.
+
+    Documents that were reviewed in the meantime are skipped. Each employee
+    receives a single notification about all of their documents.
+
+    Args:
+        queryset (QuerySet): The documents the user may review.
+        document_ids (Iterable[int]): The ids of the documents.
+        status (str): ``Document.STATUS_ACCEPTED`` or
+            ``Document.STATUS_REJECTED``.
+        actor (User, optional): The user making the change.
+        service (NotificationService, optional): The service used to queue
+            the notifications.
+
+    Returns:
+        int: The number of reviewed documents.
+    """
+    service = service or NotificationService()
+    single, many = REVIEW_MESSAGES[status]
+    with transaction.atomic():
+        documents = _lock_pending(queryset, document_ids, ["employee_id"])
+        if not documents:
+            return 0
+        bulk_transition(documents, Document.STATUS_PENDING, status, actor=actor)
+
+        counts = defaultdict(int)
+        for document in documents:
+            counts[document.employee_id] += 1
+        service.enqueue_each(
+            {
+                employee_id: single if count == 1 else many.format(count=count)
+                for employee_id, count in counts.items()
+            }
+        )
+    return len(documents)
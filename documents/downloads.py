@@ -0,0 +1,174 @@
+import os
+import re
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, parse_etags, quote_etag
+
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range_header(header, size):
+    """
+    Parses a single byte range of an HTTP ``Range`` header.
+
+    Headers that are malformed or request several ranges are ignored, as
+    allowed by RFC 9110, and the whole file is served.
+
+    Args:
+        header (str): The value of the ``Range`` header.
+        size (int): The size of the file.
+
+    Returns:
+        tuple[int, int] | None: The first and last byte of the range, or
+        None to serve the whole file.
+
+    Raises:
+        RangeNotSatisfiable: If the range lies outside the file.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - suffix, 0), size - 1
+    first = int(first)
+    if last and first > int(last):
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable()
+    last = min(int(last), size - 1) if last else size - 1
+    return first, last
+
+
+def file_iterator(file, offset, length, chunk_size=CHUNK_SIZE):
+    with file:
+        file.seek(offset)
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+async def afile_iterator(file, offset, length, chunk_size=CHUNK_SIZE):
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        await sync_to_async(file.seek, thread_sensitive=False)(offset)
+        while length > 0:
+            chunk = await read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        await sync_to_async(file.close, thread_sensitive=False)()
+
+
+def get_file_etag(field_file, sha256=""):
+    """
+    Returns a strong ETag for a stored file, based on its SHA-256 digest
+    when it is known and on its size and modification time otherwise.
+    """
+    if sha256:
+        return quote_etag(sha256)
+    storage = field_file.storage
+    modified = storage.get_modified_time(field_file.name).timestamp()
+    return quote_etag(f"{field_file.size:x}-{int(modified):x}")
+
+
+def serve_file(request, field_file, etag, content_type, as_attachment=False):
+    """
+    Serves a stored file, honouring conditional and range requests.
+
+    Depending on the ``DOCUMENT_DOWNLOAD_MODE`` setting the bytes are
+    streamed by Django (``"python"``, the default) or left to the front
+    proxy through ``X-Accel-Redirect`` (``"x-accel-redirect"``, nginx) or
+    ``X-Sendfile`` (``"x-sendfile"``, Apache/lighttpd). The proxy then
+    handles range requests itself.
+
+    Under ASGI the file is read through an async iterator, so that it is
+    streamed chunk by chunk instead of being buffered in memory.
+
+    Args:
+        request (HttpRequest): The request.
+        field_file (FieldFile): The file to serve.
+        etag (str): The quoted ETag of the file.
+        content_type (str): The MIME type of the file.
+        as_attachment (bool): Whether the browser should save the file
+            instead of displaying it.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response.headers["ETag"] = etag
+        return response
+
+    filename = os.path.basename(field_file.name)
+    mode = getattr(settings, "DOCUMENT_DOWNLOAD_MODE", "python")
+    if mode == "x-accel-redirect":
+        prefix = getattr(settings, "DOCUMENT_DOWNLOAD_ACCEL_PREFIX", "/protected-media/")
+        response = HttpResponse(content_type=content_type)
+        response.headers["X-Accel-Redirect"] = prefix + quote(field_file.name)
+    elif mode == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response.headers["X-Sendfile"] = field_file.path
+    else:
+        response = _stream_file(request, field_file, etag, content_type)
+    response.headers["ETag"] = etag
+    response.headers["Content-Disposition"] = content_disposition_header(
+        as_attachment, filename
+    )
+    return response
+
+
+def _stream_file(request, field_file, etag, content_type):
+    size = field_file.size
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if if_range is None or etag in parse_etags(if_range):
+        try:
+            byte_range = parse_range_header(request.headers.get("Range"), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response.headers["Content-Range"] = f"bytes */{size}"
+            return response
+
+    is_asgi = isinstance(request, ASGIRequest)
+    if byte_range is None and not is_asgi:
+        response = FileResponse(
+            field_file.open("rb"), content_type=content_type
+        )
+    else:
+        first, last = byte_range or (0, size - 1)
+        length = last - first + 1
+        iterator = afile_iterator if is_asgi else file_iterator
+        response = StreamingHttpResponse(
+            iterator(field_file.open("rb"), first, length),
+            content_type=content_type,
+            status=206 if byte_range else 200,
+        )
+        response.headers["Content-Length"] = str(length)
+        if byte_range:
+            response.headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+    response.headers["Accept-Ranges"] = "bytes"
+    return response
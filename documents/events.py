@@ -0,0 +1,227 @@
+import operator
+from collections import defaultdict
+from functools import reduce
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Q, When
+from django.utils import timezone
+
+from documents.models import (
+    AssistantDailyStats,
+    DecisionTimeBucket,
+    Document,
+    DocumentEvent,
+)
+
+
+# Upper bounds, in seconds, of the time-to-decision histogram buckets.
+# The last bucket is unbounded.
+DECISION_BUCKETS = [
+    60,
+    5 * 60,
+    15 * 60,
+    30 * 60,
+    60 * 60,
+    2 * 60 * 60,
+    4 * 60 * 60,
+    8 * 60 * 60,
+    24 * 60 * 60,
+    2 * 24 * 60 * 60,
+    7 * 24 * 60 * 60,
+    None,
+]
+
+EVENT_COUNTERS = {
+    DocumentEvent.EVENT_ASSIGNED: "assigned_count",
+    DocumentEvent.EVENT_ACCEPTED: "accepted_count",
+    DocumentEvent.EVENT_REJECTED: "rejected_count",
+}
+
+STATUS_EVENTS = {
+    Document.STATUS_ACCEPTED: DocumentEvent.EVENT_ACCEPTED,
+    Document.STATUS_REJECTED: DocumentEvent.EVENT_REJECTED,
+}
+
+
+def get_bucket(seconds):
+    """
+    Returns the index of the histogram bucket for a time to decision.
+    """
+    for index, bound in enumerate(DECISION_BUCKETS):
+        if bound is None or seconds <= bound:
+            return index
+
+
+def format_duration(seconds):
+    """
+    Formats a duration in seconds for display, e.g. "1 д 2 ч" or "15 мин".
+    """
+    minutes, _ = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days} д {hours} ч" if hours else f"{days} д"
+    if hours:
+        return f"{hours} ч {minutes} мин" if minutes else f"{hours} ч"
+    return f"{minutes} мин" if minutes else "< 1 мин"
+
+
+def get_median_bound(counts):
+    """
+    Estimates the median time to decision from a histogram.
+
+    Args:
+        counts (dict[int, int]): The number of decisions per bucket index.
+
+    Returns:
+        int | None: The upper bound, in seconds, of the bucket holding the
+        median; None if it is the unbounded bucket or there are no decisions.
+    """
+    total = sum(counts.values())
+    seen = 0
+    for index in sorted(counts):
+        seen += counts[index]
+        if seen * 2 >= total:
+            return DECISION_BUCKETS[index]
+    return None
+
+
+def increment(model, lookup, **deltas):
+    """
+    Adds ``deltas`` to the counters of the ``model`` row matching ``lookup``,
+    creating the row if it does not exist yet.
+    """
+    updates = {name: F(name) + value for name, value in deltas.items()}
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Created by a concurrent transaction.
+        model.objects.filter(**lookup).update(**updates)
+
+
+def increment_many(model, lookup, keys, deltas):
+    """
+    Adds ``deltas`` to the counters of several ``model`` rows with a single
+    UPDATE, creating the rows that do not exist yet.
+
+    Args:
+        model (type[Model]): The model holding the counters.
+        lookup (dict): The filters shared by the rows, e.g. the date.
+        keys (tuple[str]): The fields telling the rows apart.
+        deltas (dict[tuple, dict[str, int]]): The increments of the counters,
+            keyed by the values of ``keys``.
+    """
+    if len(deltas) == 1:
+        [(values, counters)] = deltas.items()
+        increment(model, {**lookup, **dict(zip(keys, values))}, **counters)
+        return
+    conditions = {values: Q(**dict(zip(keys, values))) for values in deltas}
+    rows = model.objects.filter(**lookup).filter(
+        reduce(operator.or_, conditions.values())
+    )
+    names = sorted({name for counters in deltas.values() for name in counters})
+    with transaction.atomic():
+        # Rows are locked in a fixed order so concurrent transitions cannot deadlock.
+        existing = set(
+            rows.select_for_update().order_by(*keys).values_list(*keys)
+        )
+        if existing:
+            rows.update(
+                **{
+                    name: Case(
+                        *[
+                            When(conditions[values], then=F(name) + counters[name])
+                            for values, counters in deltas.items()
+                            if counters.get(name)
+                        ],
+                        default=F(name),
+                        output_field=model._meta.get_field(name),
+                    )
+                    for name in names
+                }
+            )
+        missing = sorted(values for values in deltas if values not in existing)
+        if not missing:
+            return
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    [
+                        model(**lookup, **dict(zip(keys, values)), **deltas[values])
+                        for values in missing
+                    ]
+                )
+        except IntegrityError:
+            # Some were created by a concurrent transaction.
+            for values in missing:
+                increment(model, {**lookup, **dict(zip(keys, values))}, **deltas[values])
+
+
+def record_events(documents, event_type, actor_id=None, assistant_id=None):
+    """
+    Appends one event per document and updates the rollups.
+
+    Must be called in the transaction of the transition. Callers recording
+    several batches in one transaction must do so in ascending order of the
+    assistant id.
+
+    For decisions, the documents must still hold the ``assigned_to_id`` and
+    ``assigned_at`` they had before the transition.
+
+    Args:
+        documents (Iterable[Document]): The documents that were changed.
+        event_type (str): One of the ``DocumentEvent.EVENT_*`` values.
+        actor_id (int, optional): The id of the user who made the change.
+        assistant_id (int, optional): The id of the assistant a document was
+            assigned to, for ``EVENT_ASSIGNED``.
+
+    Returns:
+        list[DocumentEvent]: The created events.
+    """
+    now = timezone.now()
+    date = timezone.localdate(now)
+    counter = EVENT_COUNTERS[event_type]
+    stats = defaultdict(lambda: defaultdict(int))
+    buckets = defaultdict(int)
+    events = []
+    for document in documents:
+        if event_type == DocumentEvent.EVENT_ASSIGNED:
+            owner_id = assistant_id
+        else:
+            owner_id = document.assigned_to_id or actor_id
+        events.append(
+            DocumentEvent(
+                document_id=document.pk,
+                event_type=event_type,
+                actor_id=actor_id,
+                assistant_id=owner_id,
+            )
+        )
+        if owner_id is None:
+            continue
+        stats[owner_id][counter] += 1
+        if event_type != DocumentEvent.EVENT_ASSIGNED and document.assigned_at:
+            seconds = max(int((now - document.assigned_at).total_seconds()), 0)
+            stats[owner_id]["decision_seconds"] += seconds
+            stats[owner_id]["timed_decisions"] += 1
+            buckets[owner_id, get_bucket(seconds)] += 1
+
+    DocumentEvent.objects.bulk_create(events)
+    if stats:
+        increment_many(
+            AssistantDailyStats,
+            {"date": date},
+            ("assistant_id",),
+            {(owner_id,): deltas for owner_id, deltas in stats.items()},
+        )
+    if buckets:
+        increment_many(
+            DecisionTimeBucket,
+            {"date": date},
+            ("assistant_id", "bucket"),
+            {key: {"count": count} for key, count in buckets.items()},
+        )
+    return events
@@ -1,6 +1,8 @@
 from django import forms
 from .models import Document
+from .validators import validate_pdf_header
 from django.core.exceptions import ValidationError
+import hashlib
 import mimetypes
 import os
 
@@ -9,6 +11,17 @@ class DocumentForm(forms.ModelForm):
         model = Document
         fields = ['document_type', 'pdf_file', 'mfo', 'message']
 
+    def __init__(self, *args, upload_error=None, **kwargs):
+        """
+        Args:
+            upload_error (str, optional): The reason the upload handler
+                rejected the PDF file while it was being received.
+        """
+        super().__init__(*args, **kwargs)
+        if upload_error:
+            # The rejected file never reaches the form, report why it is missing.
+            self.fields['pdf_file'].error_messages['required'] = upload_error
+
     def clean_pdf_file(self):
         pdf = self.cleaned_data.get('pdf_file')
         if pdf:
@@ -18,6 +31,43 @@ class DocumentForm(forms.ModelForm):
             mime_type, _ = mimetypes.guess_type(pdf.name)
             if mime_type != 'application/pdf':
                 raise ValidationError('Загруженный файл не является PDF.')
+
+            digest = getattr(pdf, 'sha256', None)
+            if digest is None:
+                # The file was not received through PdfUploadHandler.
+                digest = self._inspect_file(pdf)
+            if Document.objects.filter(sha256=digest).exists():
+                raise ValidationError('Этот документ уже был загружен.')
+            self.instance.sha256 = digest
         else:
             raise ValidationError('Это поле обязательно для заполнения.')
-        return pdf
\ No newline at end of file
+        return pdf
+
+    @staticmethod
+    def _inspect_file(pdf):
+        """
+        Checks the PDF header and computes the SHA-256 digest of a file.
+        """
+        pdf.seek(0)
+        validate_pdf_header(pdf.read(2048))
+        pdf.seek(0)
+        digest = hashlib.sha256()
+        for chunk in pdf.chunks():
+            digest.update(chunk)
+        pdf.seek(0)
+        return digest.hexdigest()
+
+
+class DocumentSearchForm(forms.Form):
+    q = forms.CharField(label='Поиск', required=False, max_length=200)
+    status = forms.ChoiceField(
+        label='Статус',
+        required=False,
+        choices=[('', 'Все статусы')] + Document.STATUS_CHOICES,
+    )
+    date_from = forms.DateField(
+        label='С', required=False, widget=forms.DateInput(attrs={'type': 'date'})
+    )
+    date_to = forms.DateField(
+        label='По', required=False, widget=forms.DateInput(attrs={'type': 'date'})
+    )
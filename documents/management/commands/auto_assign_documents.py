@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from documents.assignment import AssignmentEngine
+
+
+class Command(BaseCommand):
+    """
+    Assign pending, unassigned documents to the least-loaded assistants.
+
+    Runs forever by default, polling the queue every ``--interval`` seconds
+    when it is empty. Several instances may run at the same time.
+    """
+
+    help = "Автоматически назначает документы на рассмотрении помощникам."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=10.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue once and exit.",
+        )
+
+    def handle(self, *args, **options):
+        engine = AssignmentEngine(batch_size=options["batch_size"])
+        while True:
+            assigned = engine.assign_batch()
+            count = sum(len(ids) for ids in assigned.values())
+            if count and options["verbosity"] >= 2:
+                self.stdout.write(
+                    f"Assigned {count} documents to {len(assigned)} assistants"
+                )
+            if count < options["batch_size"]:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
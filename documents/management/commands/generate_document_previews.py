@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from documents.models import Document
+from documents.previews import PreviewPipeline
+
+
+class Command(BaseCommand):
+    """
+    Generate the missing previews of documents.
+
+    Picks up documents uploaded while the in-process pipeline was disabled
+    or interrupted, and optionally retries failed ones.
+    """
+
+    help = "Генерирует превью документов, для которых они еще не готовы."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retry-failed", action="store_true")
+        parser.add_argument("--limit", type=int, default=None)
+        parser.add_argument("--workers", type=int, default=None)
+
+    def handle(self, *args, **options):
+        statuses = [Document.PREVIEW_PENDING]
+        if options["retry_failed"]:
+            statuses.append(Document.PREVIEW_FAILED)
+        documents = (
+            Document.objects.filter(preview_status__in=statuses)
+            .only("id", "pdf_file")
+            .order_by("id")
+        )
+        if options["limit"]:
+            documents = documents[: options["limit"]]
+
+        pipeline = PreviewPipeline(max_workers=options["workers"])
+        try:
+            ready = pipeline.run(documents.iterator())
+        finally:
+            pipeline.shutdown()
+        self.stdout.write(self.style.SUCCESS(f"Generated {ready} previews."))
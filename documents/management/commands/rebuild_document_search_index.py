@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from documents.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the full-text search index of all documents.
+    """
+
+    help = "Перестраивает полнотекстовый индекс документов."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rebuild_search_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-18 20:15
+
+from django.db import migrations, models
+
+from common.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # The indexes are built without locking the table on PostgreSQL.
+    atomic = False
+
+    dependencies = [
+        ('documents', '0005_document_sha256'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='document',
+            index=models.Index(fields=['employee', '-created_at', '-id'], name='doc_employee_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='document',
+            index=models.Index(fields=['assigned_to', 'status', '-created_at', '-id'], name='doc_assignee_queue_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='document',
+            index=models.Index(condition=models.Q(('assigned_to__isnull', True), ('status', 'pending')), fields=['-created_at', '-id'], name='doc_pending_unassigned_idx'),
+        ),
+    ]
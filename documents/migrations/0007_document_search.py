@@ -0,0 +1,105 @@
+# Generated by Django 4.2 on 2026-10-18 20:31
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+POSTGRES_FORWARD = [
+    """
+    CREATE FUNCTION documents_document_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.document_type, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.mfo, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(NEW.message, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER documents_document_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF document_type, mfo, message ON documents_document
+    FOR EACH ROW EXECUTE PROCEDURE documents_document_search_vector_update()
+    """,
+]
+
+# Fires the trigger for one batch of rows, keyed by the primary key so that
+# each batch is a short transaction of its own.
+POSTGRES_BACKFILL = """
+    UPDATE documents_document SET document_type = document_type
+    WHERE id IN (
+        SELECT id FROM documents_document WHERE id > %s ORDER BY id LIMIT %s
+    )
+    RETURNING id
+"""
+
+BACKFILL_BATCH_SIZE = 1000
+
+POSTGRES_INDEX = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS doc_search_vector_idx "
+    "ON documents_document USING gin (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX CONCURRENTLY IF EXISTS doc_search_vector_idx",
+    "DROP TRIGGER IF EXISTS documents_document_search_vector_trigger ON documents_document",
+    "DROP FUNCTION IF EXISTS documents_document_search_vector_update()",
+]
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE documents_document_fts USING fts5(document_type, mfo, message)",
+    """
+    INSERT INTO documents_document_fts(rowid, document_type, mfo, message)
+    SELECT id, document_type, mfo, message FROM documents_document
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS documents_document_fts",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return run
+
+
+def backfill_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    last_id = 0
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            cursor.execute(POSTGRES_BACKFILL, [last_id, BACKFILL_BATCH_SIZE])
+            ids = [row[0] for row in cursor.fetchall()]
+            if not ids:
+                break
+            last_id = max(ids)
+
+
+class Migration(migrations.Migration):
+
+    # The search vectors are filled in batches and the index is built
+    # without locking the table on PostgreSQL.
+    atomic = False
+
+    dependencies = [
+        ('documents', '0006_document_queue_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+        migrations.RunPython(backfill_search_vector, migrations.RunPython.noop),
+        migrations.RunPython(_run({'postgresql': POSTGRES_INDEX}), migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0007_document_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='extracted_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='preview_status',
+            field=models.CharField(choices=[('pending', 'Обрабатывается'), ('ready', 'Готов'), ('failed', 'Ошибка')], default='pending', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='documents/thumbnails/'),
+        ),
+    ]
@@ -1,11 +1,28 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 
 
+from common.tracking import TrackChangesMixin
 from documents.validators import validate_file_size
 
 
-class Document(models.Model):
+class DocumentQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Returns the documents the given user can see.
+
+        Employees can only see their own documents, managers and assistants
+        can see all documents, other users can't see any.
+        """
+        if user.is_employee():
+            return self.filter(employee=user)
+        if user.is_manager() or user.is_assistant():
+            return self
+        return self.none()
+
+
+class Document(TrackChangesMixin, models.Model):
     STATUS_PENDING = "pending"
     STATUS_ACCEPTED = "accepted"
     STATUS_REJECTED = "rejected"
@@ -16,6 +33,16 @@ class Document(models.Model):
         (STATUS_REJECTED, "Отклонено"),
     ]
 
+    PREVIEW_PENDING = "pending"
+    PREVIEW_READY = "ready"
+    PREVIEW_FAILED = "failed"
+
+    PREVIEW_STATUS_CHOICES = [
+        (PREVIEW_PENDING, "Обрабатывается"),
+        (PREVIEW_READY, "Готов"),
+        (PREVIEW_FAILED, "Ошибка"),
+    ]
+
     employee = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="documents"
     )
@@ -35,13 +62,151 @@ class Document(models.Model):
         blank=True,
         related_name="assigned_documents",
     )
+    assigned_at = models.DateTimeField(null=True, blank=True, editable=False)
+    sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    # Incremented by every transition, see documents.transitions.
+    version = models.PositiveIntegerField(default=0, editable=False)
+    # Filled in by documents.previews.PreviewPipeline after the upload.
+    preview_status = models.CharField(
+        max_length=10,
+        choices=PREVIEW_STATUS_CHOICES,
+        default=PREVIEW_PENDING,
+        editable=False,
+    )
+    page_count = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    thumbnail = models.ImageField(
+        upload_to="documents/thumbnails/", blank=True, editable=False
+    )
+    extracted_text = models.TextField(blank=True, editable=False)
+    # Maintained by a database trigger on PostgreSQL, unused elsewhere.
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = DocumentQuerySet.as_manager()
+
+    tracked_fields = ("status",)
+
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["status", "assigned_to"]),
+            models.Index(
+                fields=["employee", "-created_at", "-id"],
+                name="doc_employee_created_idx",
+            ),
+            models.Index(
+                fields=["assigned_to", "status", "-created_at", "-id"],
+                name="doc_assignee_queue_idx",
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(status="pending", assigned_to__isnull=True),
+                name="doc_pending_unassigned_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sha256"],
+                condition=~models.Q(sha256=""),
+                name="documents_document_unique_sha256",
+            ),
         ]
 
     def __str__(self):
-        return f"{self.employee} - {self.status}"
\ No newline at end of file
+        return f"{self.employee} - {self.status}"
+
+
+class DocumentEvent(models.Model):
+    """
+    An append-only record of a document transition.
+
+    Rows are written by ``documents.events.record_events`` and never updated.
+    """
+
+    EVENT_ASSIGNED = "assigned"
+    EVENT_ACCEPTED = "accepted"
+    EVENT_REJECTED = "rejected"
+
+    EVENT_CHOICES = [
+        (EVENT_ASSIGNED, "Назначен"),
+        (EVENT_ACCEPTED, "Принят"),
+        (EVENT_REJECTED, "Отклонен"),
+    ]
+
+    document = models.ForeignKey(
+        Document, on_delete=models.CASCADE, related_name="events"
+    )
+    event_type = models.CharField(max_length=10, choices=EVENT_CHOICES)
+    # The user who made the change, empty for the auto-assignment engine.
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    assistant = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["document", "id"])]
+
+    def __str__(self):
+        return f"{self.document_id}: {self.get_event_type_display()}"
+
+
+class AssistantDailyStats(models.Model):
+    """
+    Per assistant and day counters, maintained incrementally with every
+    ``DocumentEvent``. Decisions made by a manager on an unassigned document
+    are counted for the manager.
+    """
+
+    assistant = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    date = models.DateField()
+    assigned_count = models.PositiveIntegerField(default=0)
+    accepted_count = models.PositiveIntegerField(default=0)
+    rejected_count = models.PositiveIntegerField(default=0)
+    # Sum over the decided documents that had been assigned.
+    decision_seconds = models.PositiveBigIntegerField(default=0)
+    timed_decisions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "assistant"], name="assistant_daily_stats_unique"
+            )
+        ]
+
+
+class DecisionTimeBucket(models.Model):
+    """
+    A histogram of the time from assignment to decision, per assistant and
+    day, used to estimate the median without reading the events.
+
+    ``bucket`` is an index into ``documents.events.DECISION_BUCKETS``.
+    """
+
+    assistant = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    date = models.DateField()
+    bucket = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "assistant", "bucket"],
+                name="decision_time_bucket_unique",
+            )
+        ]
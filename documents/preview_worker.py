@@ -0,0 +1,73 @@
+"""
+PDF preview extraction running inside the worker processes of
+``documents.previews.PreviewPipeline``.
+
+This module must stay importable without Django being set up, because the
+worker processes are spawned and only import what they execute.
+"""
+import signal
+
+try:
+    import pymupdf
+except ImportError:  # PyMuPDF is not installed
+    pymupdf = None
+
+
+class PreviewTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise PreviewTimeout()
+
+
+def extract_preview(path, timeout, thumbnail_width, text_limit):
+    """
+    Extracts the page count, the plain text and a first page thumbnail of a
+    PDF file.
+
+    The extraction is aborted with ``PreviewTimeout`` after ``timeout``
+    seconds. The alarm is only delivered between MuPDF calls; a call stuck
+    in native code is ended by the parent, which kills the worker.
+
+    Args:
+        path (str): The path of the PDF file.
+        timeout (int): The maximum processing time, in seconds.
+        thumbnail_width (int): The width of the thumbnail, in pixels.
+        text_limit (int): The maximum number of extracted characters.
+
+    Returns:
+        dict: ``page_count`` (int), ``text`` (str) and ``thumbnail``
+        (PNG bytes, or None for a document without pages).
+    """
+    if pymupdf is None:
+        raise RuntimeError("PyMuPDF is required to generate document previews.")
+
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.alarm(timeout)
+    try:
+        with pymupdf.open(path) as pdf:
+            page_count = pdf.page_count
+            parts = []
+            length = 0
+            for page in pdf:
+                if length >= text_limit:
+                    break
+                text = page.get_text()
+                parts.append(text)
+                length += len(text)
+
+            thumbnail = None
+            if page_count:
+                first_page = pdf[0]
+                zoom = thumbnail_width / first_page.rect.width
+                pixmap = first_page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom))
+                thumbnail = pixmap.tobytes("png")
+    finally:
+        signal.alarm(0)
+
+    return {
+        "page_count": page_count,
+        "text": "".join(parts)[:text_limit],
+        "thumbnail": thumbnail,
+    }
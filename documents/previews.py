@@ -0,0 +1,273 @@
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection
+
+from documents.models import Document
+from documents.preview_worker import extract_preview
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds granted past the timeout to the alarm of the worker before the
+# worker is killed from the parent.
+KILL_GRACE = 5
+
+# Seconds the supervisor waits after an unexpected error before going on.
+RESTART_DELAY = 1
+
+
+class PreviewPipeline:
+    """
+    Generates document previews in a bounded pool of worker processes.
+
+    The worker extracts the page count, the plain text and a first page
+    thumbnail from the stored PDF. The results are written back to the
+    document with a single UPDATE, so pages showing a document never have
+    to open the original file.
+
+    ``submit`` returns immediately and the documents are processed and
+    their results stored by a background supervisor thread. ``run``
+    processes documents and stores their results in the calling thread.
+
+    At most one file per worker is handed to the pool at a time, so that the
+    deadline of a file starts when a worker picks it up. The worker aborts
+    itself after ``timeout`` seconds, but its alarm cannot interrupt MuPDF
+    while it is stuck in native code: a file still running ``KILL_GRACE``
+    seconds later is marked as failed, the pool is killed and recreated,
+    and the other files it was running are submitted again.
+    """
+
+    def __init__(self, max_workers=None, timeout=None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            max_workers (int, optional): The number of worker processes.
+                Defaults to the ``DOCUMENT_PREVIEW_WORKERS`` setting.
+            timeout (int, optional): The maximum processing time per file,
+                in seconds. Defaults to the ``DOCUMENT_PREVIEW_TIMEOUT``
+                setting.
+        """
+        self.max_workers = max_workers or getattr(
+            settings, "DOCUMENT_PREVIEW_WORKERS", 2
+        )
+        self.timeout = timeout or getattr(settings, "DOCUMENT_PREVIEW_TIMEOUT", 30)
+        self.thumbnail_width = getattr(
+            settings, "DOCUMENT_PREVIEW_THUMBNAIL_WIDTH", 200
+        )
+        self.text_limit = getattr(settings, "DOCUMENT_PREVIEW_TEXT_LIMIT", 100_000)
+        self._executor = None
+        self._jobs = queue.SimpleQueue()
+        self._supervisor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Forking a multithreaded server process is unsafe, spawn instead.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def submit(self, document):
+        """
+        Schedules the preview generation of a document.
+
+        Args:
+            document (Document): The document, with ``pdf_file`` loaded.
+        """
+        path = self._get_path(document)
+        if path is None:
+            return
+        with self._lock:
+            if self._supervisor is None or not self._supervisor.is_alive():
+                self._supervisor = threading.Thread(
+                    target=self._supervise,
+                    name="document-preview-supervisor",
+                    daemon=True,
+                )
+                self._supervisor.start()
+        self._jobs.put((document.pk, path))
+
+    def run(self, documents):
+        """
+        Generates the previews of several documents and waits for them.
+
+        Args:
+            documents (Iterable[Document]): The documents, with ``pdf_file``
+                loaded.
+
+        Returns:
+            int: The number of documents whose preview is ready.
+        """
+        jobs = (
+            (document.pk, path)
+            for document in documents
+            if (path := self._get_path(document)) is not None
+        )
+        ready = 0
+
+        def store(document_id, future):
+            nonlocal ready
+            ready += self._store_result(document_id, future)
+
+        self._run_jobs(lambda block: next(jobs, None), store)
+        return ready
+
+    def _get_path(self, document):
+        try:
+            return document.pdf_file.path
+        except (NotImplementedError, ValueError):
+            # The storage has no local paths or the document has no file.
+            self._mark_failed(document.pk)
+            return None
+
+    def _supervise(self):
+        def get_job(block):
+            try:
+                return self._jobs.get(block=block)
+            except queue.Empty:
+                return None
+
+        def store(document_id, future):
+            try:
+                self._store_result(document_id, future)
+            except Exception:
+                logger.exception("Could not store the preview of document %s", document_id)
+            finally:
+                connection.close()
+
+        # An error outside ``store``, e.g. in ``_mark_failed`` or while
+        # starting the pool, must not stop the thread, or submitted jobs
+        # would never run. The jobs running at that point are left pending.
+        while True:
+            try:
+                self._run_jobs(get_job, store)
+            except Exception:
+                logger.exception("The preview supervisor failed, restarting it")
+                connection.close()
+                time.sleep(RESTART_DELAY)
+
+    def _run_jobs(self, get_job, store):
+        """
+        Runs extraction jobs with at most one job per worker in the pool,
+        killing the pool when a job overruns its deadline.
+
+        Args:
+            get_job (callable): Called with ``block``; returns the next
+                ``(document_id, path)`` job, or None if there is none (yet).
+            store (callable): Called with the document id and the finished
+                future of every job that did not overrun its deadline.
+        """
+        # Future -> (document_id, path, deadline).
+        running = {}
+        while True:
+            while len(running) < self.max_workers:
+                job = get_job(block=not running)
+                if job is None:
+                    break
+                running.update(self._start(*job))
+            if not running:
+                return
+
+            deadline = min(job[2] for job in running.values())
+            done, _ = wait(
+                running,
+                timeout=max(deadline - time.monotonic(), 0),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                store(running.pop(future)[0], future)
+
+            now = time.monotonic()
+            expired = [future for future, job in running.items() if job[2] <= now]
+            if not expired:
+                continue
+            for future in expired:
+                document_id = running.pop(future)[0]
+                logger.warning(
+                    "Preview of document %s timed out, restarting the workers",
+                    document_id,
+                )
+                self._mark_failed(document_id)
+            self._kill_executor()
+            restarted = {}
+            for document_id, path, _ in running.values():
+                restarted.update(self._start(document_id, path))
+            running = restarted
+
+    def _start(self, document_id, path):
+        args = (path, self.timeout, self.thumbnail_width, self.text_limit)
+        try:
+            future = self.executor.submit(extract_preview, *args)
+        except BrokenProcessPool:
+            # A worker died, e.g. MuPDF crashed on a file.
+            self._kill_executor()
+            future = self.executor.submit(extract_preview, *args)
+        deadline = time.monotonic() + self.timeout + KILL_GRACE
+        return {future: (document_id, path, deadline)}
+
+    def _kill_executor(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        # ProcessPoolExecutor cannot cancel running calls; kill its workers.
+        for process in list(executor._processes.values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _store_result(self, document_id, future):
+        """
+        Stores the result of an extraction on the document.
+
+        Returns:
+            bool: Whether the extraction succeeded.
+        """
+        try:
+            result = future.result()
+        except Exception:
+            self._mark_failed(document_id)
+            return False
+        thumbnail = ""
+        if result["thumbnail"]:
+            field = Document._meta.get_field("thumbnail")
+            thumbnail = field.storage.save(
+                # Unguessable, the thumbnails are served by a permission
+                # checked view only.
+                field.generate_filename(None, f"{uuid.uuid4().hex}.png"),
+                ContentFile(result["thumbnail"]),
+            )
+        Document.objects.filter(pk=document_id).update(
+            page_count=result["page_count"],
+            extracted_text=result["text"],
+            thumbnail=thumbnail,
+            preview_status=Document.PREVIEW_READY,
+        )
+        return True
+
+    def _mark_failed(self, document_id):
+        Document.objects.filter(pk=document_id).update(
+            preview_status=Document.PREVIEW_FAILED
+        )
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+preview_pipeline = PreviewPipeline()
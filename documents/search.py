@@ -0,0 +1,131 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q, Value
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_CONFIG = "russian"
+
+FTS_TABLE = "documents_document_fts"
+
+
+def search_documents(queryset, query):
+    """
+    Filters a queryset of documents by a full-text query and orders it by
+    relevance.
+
+    PostgreSQL uses the ``search_vector`` column maintained by a trigger and
+    its GIN index. SQLite uses the ``documents_document_fts`` FTS5 table.
+    Other databases fall back to ``icontains`` filters without ranking.
+
+    Args:
+        queryset (QuerySet): The documents to search.
+        query (str): The text entered by the user.
+
+    Returns:
+        QuerySet: The matching documents annotated with ``search_rank``.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == "postgresql":
+        search_query = SearchQuery(
+            query, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        queryset = queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F("search_vector"), search_query)
+        )
+    elif vendor == "sqlite":
+        match = _fts5_query(query)
+        if not match:
+            return queryset.none()
+        queryset = queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,)
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = documents_document.id",
+                (match,),
+            )
+        )
+    else:
+        queryset = queryset.filter(
+            Q(document_type__icontains=query)
+            | Q(mfo__icontains=query)
+            | Q(message__icontains=query)
+        ).annotate(search_rank=Value(0.0))
+    return queryset.order_by("-search_rank", "-created_at", "-id")
+
+
+def _fts5_query(query):
+    """
+    Turns user input into an FTS5 query matching all words as prefixes,
+    so that FTS5 syntax characters in the input can't break the query.
+    """
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def index_document(document):
+    """
+    Updates the SQLite FTS5 entry of a document.
+
+    PostgreSQL keeps ``search_vector`` up to date with a trigger, so this is
+    a no-op there.
+    """
+    connection = connections[document._state.db or "default"]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [document.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, document_type, mfo, message) "
+            "VALUES (%s, %s, %s, %s)",
+            [document.pk, document.document_type, document.mfo, document.message],
+        )
+
+
+def unindex_document(document):
+    """
+    Removes the SQLite FTS5 entry of a deleted document.
+    """
+    connection = connections[document._state.db or "default"]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [document.pk])
+
+
+def rebuild_search_index(using="default", batch_size=1000):
+    """
+    Rebuilds the search index of all documents, e.g. after rows were
+    written with ``bulk_create``.
+
+    On PostgreSQL the rows are updated in batches keyed by the primary key,
+    each in its own transaction unless the caller holds one, so that writes
+    to the table are not blocked for the whole rebuild.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            last_id = 0
+            while True:
+                # Fires the trigger maintaining search_vector.
+                cursor.execute(
+                    "UPDATE documents_document SET document_type = document_type "
+                    "WHERE id IN (SELECT id FROM documents_document WHERE id > %s "
+                    "ORDER BY id LIMIT %s) RETURNING id",
+                    [last_id, batch_size],
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+                if not ids:
+                    break
+                last_id = max(ids)
+        elif connection.vendor == "sqlite":
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, document_type, mfo, message) "
+                "SELECT id, document_type, mfo, message FROM documents_document"
+            )
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from documents.events import STATUS_EVENTS, record_events
+from documents.models import Document
+from documents.previews import preview_pipeline
+from documents.search import index_document, unindex_document
+from documents.transitions import ALLOWED_TRANSITIONS
+
+
+@receiver(post_save, sender=Document)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the SQLite full-text index in sync with the searchable fields.
+    """
+    searchable = {"document_type", "mfo", "message"}
+    if update_fields is None or searchable.intersection(update_fields):
+        index_document(instance)
+
+
+@receiver(post_delete, sender=Document)
+def remove_from_search_index(sender, instance, **kwargs):
+    """
+    Remove deleted documents from the SQLite full-text index.
+    """
+    unindex_document(instance)
+
+
+@receiver(post_save, sender=Document)
+def generate_preview(sender, instance, created, **kwargs):
+    """
+    Start the preview generation of new documents once they are committed.
+    """
+    if created and getattr(settings, "DOCUMENT_PREVIEWS_ENABLED", True):
+        transaction.on_commit(lambda: preview_pipeline.submit(instance))
+
+
+@receiver(post_save, sender=Document)
+def record_status_change(sender, instance, created, **kwargs):
+    """
+    Record a decision event when the status is changed by saving the
+    document. ``documents.transitions`` records its own events and does not
+    go through ``save``. Changes ``ALLOWED_TRANSITIONS`` forbids, e.g. from
+    accepted to rejected, are not counted as another decision.
+    """
+    if created or not instance.has_changed("status"):
+        return
+    if instance.status not in ALLOWED_TRANSITIONS.get(instance.previous("status"), ()):
+        return
+    event_type = STATUS_EVENTS.get(instance.status)
+    if event_type:
+        record_events([instance], event_type)
@@ -0,0 +1,142 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from documents.assignment import AssignmentEngine
+from documents.bulk import bulk_review
+from documents.models import AssistantDailyStats, Document
+from documents.views import (
+    AssistantDocumentListView,
+    EmployeeDocumentListView,
+    ManagerDocumentListView,
+)
+from monitoring.testing import assert_max_queries
+from users.models import User
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    DOCUMENT_PREVIEWS_ENABLED=False,
+    QUERY_BUDGET_STRICT=True,
+)
+class DocumentListQueryBudgetTests(TestCase):
+    """
+    The list views stay within their ``query_budget``, with the session, the
+    user and the unread count cached or not.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user(username="employee", role="employee")
+        cls.manager = User.objects.create_user(username="manager", role="manager")
+        cls.assistant = User.objects.create_user(username="assistant", role="assistant")
+        employees = [
+            User.objects.create_user(username=f"employee_{i}", role="employee")
+            for i in range(6)
+        ]
+        Document.objects.bulk_create(
+            [
+                Document(
+                    employee=employees[i % len(employees)],
+                    assigned_to=cls.assistant if i % 2 else None,
+                    pdf_file="documents/test.pdf",
+                    mfo="123456789",
+                    document_type=f"Document {i}",
+                    message="test",
+                )
+                for i in range(12)
+            ]
+            + [
+                Document(
+                    employee=cls.employee,
+                    pdf_file="documents/test.pdf",
+                    mfo="123456789",
+                    document_type=f"Own document {i}",
+                    message="test",
+                )
+                for i in range(6)
+            ]
+        )
+
+    def assert_within_budget(self, user, url_name, view_class):
+        self.client.force_login(user)
+        url = reverse(f"documents:{url_name}")
+        cache.clear()
+        with assert_max_queries(view_class.query_budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with assert_max_queries(view_class.query_budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_employee_documents(self):
+        self.assert_within_budget(
+            self.employee, "employee_documents", EmployeeDocumentListView
+        )
+
+    def test_manager_documents(self):
+        self.assert_within_budget(
+            self.manager, "manager_documents", ManagerDocumentListView
+        )
+
+    def test_assistant_documents(self):
+        self.assert_within_budget(
+            self.assistant, "assistant_documents", AssistantDocumentListView
+        )
+
+
+@override_settings(DOCUMENT_PREVIEWS_ENABLED=False)
+class RollupQueryTests(TestCase):
+    """
+    Transitions touching several assistants update the rollups without a
+    statement per assistant.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = User.objects.create_user(username="employee", role="employee")
+        cls.manager = User.objects.create_user(username="manager", role="manager")
+        cls.assistants = [
+            User.objects.create_user(username=f"assistant_{i}", role="assistant")
+            for i in range(6)
+        ]
+
+    def create_documents(self, count):
+        return Document.objects.bulk_create(
+            [
+                Document(
+                    employee=self.employee,
+                    pdf_file="documents/test.pdf",
+                    mfo="123456789",
+                    document_type=f"Document {i}",
+                    message="test",
+                )
+                for i in range(count)
+            ]
+        )
+
+    def test_auto_assign(self):
+        self.create_documents(12)
+        with assert_max_queries(50):
+            assigned = AssignmentEngine().assign_batch()
+        self.assertEqual(len(assigned), len(self.assistants))
+        self.assertEqual(
+            sorted(AssistantDailyStats.objects.values_list("assigned_count", flat=True)),
+            [2] * len(self.assistants),
+        )
+
+    def test_bulk_review(self):
+        documents = self.create_documents(12)
+        AssignmentEngine().assign_all()
+        with assert_max_queries(20):
+            reviewed = bulk_review(
+                Document.objects.all(),
+                [document.id for document in documents],
+                Document.STATUS_ACCEPTED,
+                actor=self.manager,
+            )
+        self.assertEqual(reviewed, 12)
+        stats = AssistantDailyStats.objects.values_list(
+            "assigned_count", "accepted_count", "timed_decisions"
+        )
+        self.assertEqual(sorted(stats), [(2, 2, 2)] * len(self.assistants))
@@ -0,0 +1,148 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from documents.events import STATUS_EVENTS, record_events
+from documents.models import Document, DocumentEvent
+from monitoring.metrics import registry
+
+
+# Assigning a document keeps it pending, reviewing it is final.
+ALLOWED_TRANSITIONS = {
+    Document.STATUS_PENDING: {
+        Document.STATUS_PENDING,
+        Document.STATUS_ACCEPTED,
+        Document.STATUS_REJECTED,
+    },
+    Document.STATUS_ACCEPTED: set(),
+    Document.STATUS_REJECTED: set(),
+}
+
+TRANSITIONS = registry.counter(
+    "dms_document_transitions_total",
+    "Committed document status transitions.",
+    ["source", "target"],
+)
+
+
+def _count(source, target, count):
+    if count:
+        transaction.on_commit(
+            lambda: TRANSITIONS.inc(count, source=source, target=target)
+        )
+
+
+class InvalidTransition(Exception):
+    """
+    Raised when a document cannot move from its status to the requested one.
+    """
+
+
+class TransitionConflict(Exception):
+    """
+    Raised when a document was changed by someone else since it was read.
+    """
+
+
+def check_transition(source, target):
+    """
+    Raises InvalidTransition if a document cannot move from ``source`` to
+    ``target``.
+    """
+    if target not in ALLOWED_TRANSITIONS.get(source, ()):
+        raise InvalidTransition(f"{source} -> {target}")
+
+
+def _prepare(target, changes):
+    """
+    Returns the event type of a transition, stamping ``assigned_at`` on
+    assignments.
+    """
+    if target in STATUS_EVENTS:
+        return STATUS_EVENTS[target]
+    if "assigned_to_id" in changes:
+        changes.setdefault("assigned_at", timezone.now())
+        return DocumentEvent.EVENT_ASSIGNED
+    return None
+
+
+def transition(document, target, actor=None, **changes):
+    """
+    Moves a document to the ``target`` status with a single conditional UPDATE.
+
+    The row is only updated if its status and version still match the ones
+    of ``document``, so a concurrent change is detected instead of being
+    overwritten. On success a ``DocumentEvent`` is recorded and the status,
+    the version and ``changes`` are applied to ``document`` too.
+
+    Args:
+        document (Document): The document as read by the caller. ``pk``,
+            ``status``, ``version``, ``assigned_to_id`` and ``assigned_at``
+            are used.
+        target (str): The new status.
+        actor (User, optional): The user making the change.
+        **changes: Other fields to update, e.g. ``assigned_to_id``.
+
+    Raises:
+        InvalidTransition: If the transition is not allowed.
+        TransitionConflict: If the document was changed in the meantime.
+    """
+    check_transition(document.status, target)
+    event_type = _prepare(target, changes)
+    updated = Document.objects.filter(
+        pk=document.pk, status=document.status, version=document.version
+    ).update(status=target, version=F("version") + 1, **changes)
+    if not updated:
+        raise TransitionConflict(document.pk)
+    _count(document.status, target, updated)
+    if event_type:
+        record_events(
+            [document],
+            event_type,
+            actor_id=actor and actor.pk,
+            assistant_id=changes.get("assigned_to_id"),
+        )
+    document.status = target
+    document.version += 1
+    for name, value in changes.items():
+        setattr(document, name, value)
+    document.reset_tracking()
+
+
+def bulk_transition(documents, source, target, actor=None, **changes):
+    """
+    Moves several documents from the ``source`` to the ``target`` status
+    with a single UPDATE and records an event for each of them.
+
+    The caller must hold the row locks of ``documents`` (see
+    ``select_for_update``) and have checked that they are in the ``source``
+    status, so that the events match the updated rows.
+
+    Args:
+        documents (list[Document]): The locked documents, with ``pk``,
+            ``assigned_to_id`` and ``assigned_at`` loaded.
+        source (str): The expected current status.
+        target (str): The new status.
+        actor (User, optional): The user making the change.
+        **changes: Other fields to update, e.g. ``assigned_to_id``.
+
+    Returns:
+        int: The number of updated documents.
+
+    Raises:
+        InvalidTransition: If the transition is not allowed.
+    """
+    check_transition(source, target)
+    event_type = _prepare(target, changes)
+    updated = Document.objects.filter(
+        pk__in=[document.pk for document in documents], status=source
+    ).update(status=target, version=F("version") + 1, **changes)
+    _count(source, target, updated)
+    if event_type:
+        record_events(
+            documents,
+            event_type,
+            actor_id=actor and actor.pk,
+            assistant_id=changes.get("assigned_to_id"),
+        )
+    return updated
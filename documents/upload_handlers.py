@@ -0,0 +1,74 @@
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadhandler import (
+    SkipFile,
+    StopFutureHandlers,
+    TemporaryFileUploadHandler,
+)
+
+from documents.validators import MAX_UPLOAD_SIZE, validate_pdf_header
+
+
+class PdfUploadHandler(TemporaryFileUploadHandler):
+    """
+    Upload handler validating a PDF while it is being received.
+
+    The file is rejected as soon as its first chunk does not look like a PDF
+    or the received size passes ``MAX_UPLOAD_SIZE``, without spooling the rest
+    of it. A SHA-256 digest is computed on the fly and exposed as the
+    ``sha256`` attribute of the uploaded file. The reason of a rejection is
+    kept in ``error``.
+
+    Other file fields are passed on to the next handlers untouched.
+    """
+
+    pdf_field_name = "pdf_file"
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.active = False
+        self.error = None
+
+    def new_file(self, field_name, *args, **kwargs):
+        self.active = field_name == self.pdf_field_name
+        if not self.active:
+            return
+        self.error = None
+        self.received = 0
+        self.digest = hashlib.sha256()
+        super().new_file(field_name, *args, **kwargs)
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        if start == 0:
+            try:
+                validate_pdf_header(raw_data)
+            except ValidationError as error:
+                self.reject(error.messages[0])
+        self.received += len(raw_data)
+        if self.received > MAX_UPLOAD_SIZE:
+            self.reject("Размер файла не должен превышать 5 МБ.")
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+        file = super().file_complete(file_size)
+        file.sha256 = self.digest.hexdigest()
+        return file
+
+    def reject(self, error):
+        """
+        Stops receiving the current file, discarding the remaining data.
+
+        Args:
+            error (str): The reason of the rejection.
+        """
+        self.active = False
+        self.error = error
+        raise SkipFile()
@@ -5,7 +5,15 @@ from .views import (
     ManagerDocumentListView,
     AssistantDocumentListView,
     DocumentDetailView,
+    DocumentDownloadView,
+    DocumentThumbnailView,
+    DocumentSearchView,
     AssignDocumentView,
+    AutoAssignDocumentsView,
+    BulkAssignDocumentsView,
+    ManagerBulkReviewDocumentsView,
+    AssistantBulkReviewDocumentsView,
+    ManagerDashboardView,
     ManagerReviewDocumentView,
     AssistantReviewDocumentView,
 )
@@ -18,6 +26,14 @@ urlpatterns = [
     path('manager/documents/', ManagerDocumentListView.as_view(), name='manager_documents'),
     path('assistant/documents/', AssistantDocumentListView.as_view(), name='assistant_documents'),
     path('document/<int:pk>/', DocumentDetailView.as_view(), name='document_detail'),
+    path('document/<int:pk>/download/', DocumentDownloadView.as_view(), name='download_document'),
+    path('document/<int:pk>/thumbnail/', DocumentThumbnailView.as_view(), name='document_thumbnail'),
+    path('search/', DocumentSearchView.as_view(), name='search_documents'),
+    path('manager/documents/auto-assign/', AutoAssignDocumentsView.as_view(), name='auto_assign_documents'),
+    path('manager/dashboard/', ManagerDashboardView.as_view(), name='manager_dashboard'),
+    path('manager/documents/bulk-assign/', BulkAssignDocumentsView.as_view(), name='bulk_assign_documents'),
+    path('manager/documents/bulk-review/', ManagerBulkReviewDocumentsView.as_view(), name='manager_bulk_review_documents'),
+    path('assistant/documents/bulk-review/', AssistantBulkReviewDocumentsView.as_view(), name='assistant_bulk_review_documents'),
     path('manager/document/<int:pk>/assign/', AssignDocumentView.as_view(), name='assign_document'),
     path('manager/document/<int:pk>/review/', ManagerReviewDocumentView.as_view(), name='manager_review_document'),
     path('assistant/document/<int:pk>/review/', AssistantReviewDocumentView.as_view(), name='assistant_review_document'),
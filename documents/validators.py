@@ -1,7 +1,30 @@
 from django.core.exceptions import ValidationError
 
+try:
+    import magic
+except ImportError:  # libmagic is not installed
+    magic = None
+
+
+MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+
+PDF_MAGIC = b"%PDF-"
+
 
 def validate_file_size(value):
-    max_size = 5 * 1024 * 1024
-    if value.size > max_size:
+    if value.size > MAX_UPLOAD_SIZE:
         raise ValidationError("Размер файла не должен превышать 5 МБ.")
+
+
+def validate_pdf_header(data):
+    """
+    Checks that the first bytes of a file belong to a PDF document.
+
+    Args:
+        data (bytes): The beginning of the file, at least a few KB when available.
+    """
+    if not data.startswith(PDF_MAGIC):
+        raise ValidationError("Загруженный файл не является PDF.")
+    if magic is not None:
+        if magic.from_buffer(data[:2048], mime=True) != "application/pdf":
+            raise ValidationError("Загруженный файл не является PDF.")
@@ -1,44 +1,118 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.views import View
 from django.views.generic import (
     CreateView,
+    TemplateView,
     ListView,
     DetailView,
     UpdateView,
 )
+from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from django.contrib import messages
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect
 from django.core.exceptions import PermissionDenied
-
-
-from documents.models import Document
-from documents.forms import DocumentForm
+from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+
+from documents.assignment import AssignmentEngine, get_assistants_with_load
+from documents.bulk import bulk_assign, bulk_review
+from documents.downloads import get_file_etag, serve_file
+from documents.events import DECISION_BUCKETS, format_duration, get_median_bound
+from documents.models import AssistantDailyStats, DecisionTimeBucket, Document
+from documents.forms import DocumentForm, DocumentSearchForm
 from documents.mixins import RoleRequiredMixin
+from common.pagination import KeysetPaginationMixin
+from documents.search import search_documents
+from documents.transitions import InvalidTransition, TransitionConflict, transition
+from documents.upload_handlers import PdfUploadHandler
 
 
 from notifications.utils import NotificationService
 
 
+def get_expected_version(request, document):
+    """
+    Returns the version of the document the submitted form was rendered
+    with, or the current one if the form did not send it.
+    """
+    version = request.POST.get("version", "")
+    return int(version) if version.isdigit() else document.version
+
+
+def get_selected_assistant_id(request):
+    """
+    Returns the id of the assistant chosen in the ``assistant`` field of a
+    form, or None if it is missing or not an active assistant.
+    """
+    assistant_id = request.POST.get("assistant", "")
+    if not assistant_id.isdigit():
+        return None
+    is_assistant = (
+        get_user_model()
+        .objects.filter(id=assistant_id, role="assistant", is_active=True)
+        .exists()
+    )
+    return int(assistant_id) if is_assistant else None
+
+
+@method_decorator(csrf_exempt, name="dispatch")
 class DocumentCreateView(LoginRequiredMixin, RoleRequiredMixin, CreateView):
+    """
+    A view for uploading a document.
+
+    The PDF file is validated and hashed by ``PdfUploadHandler`` while it is
+    being received. The handler has to be installed before the request body
+    is read, which ``CsrfViewMiddleware`` would do, so the CSRF check is run
+    from ``dispatch`` instead.
+    """
+
     model = Document
     form_class = DocumentForm
     template_name = "documents/upload_document.html"
     success_url = reverse_lazy("documents:employee_documents")
     required_role = "employee"
 
+    def dispatch(self, request, *args, **kwargs):
+        self.upload_handler = PdfUploadHandler(request)
+        request.upload_handlers.insert(0, self.upload_handler)
+        return csrf_protect(super().dispatch)(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs["upload_error"] = self.upload_handler.error
+        return kwargs
+
     def form_valid(self, form):
         form.instance.employee = self.request.user
+        try:
+            with transaction.atomic():
+                response = super().form_valid(form)
+        except IntegrityError:
+            # Two identical files were uploaded at the same time.
+            form.add_error("pdf_file", "Этот документ уже был загружен.")
+            return self.form_invalid(form)
         messages.success(
             self.request, "Документ успешно загружен и отправлен на рассмотрение."
         )
-        return super().form_valid(form)
+        return response
 
     def form_invalid(self, form):
         messages.error(self.request, "Пожалуйста, исправьте ошибки в форме.")
         return self.render_to_response(self.get_context_data(form=form))
 
 
-class EmployeeDocumentListView(LoginRequiredMixin, RoleRequiredMixin, ListView):
+class EmployeeDocumentListView(
+    LoginRequiredMixin, RoleRequiredMixin, KeysetPaginationMixin, ListView
+):
     """
     A view for displaying the documents created by the current user.
 
@@ -51,16 +125,23 @@ class EmployeeDocumentListView(LoginRequiredMixin, RoleRequiredMixin, ListView):
     context_object_name = "documents"
     paginate_by = 5
     required_role = "employee"
+    # Counted with cold caches: the first request of a session also loads
+    # the session, the user and the unread count, cached afterwards.
+    query_budget = 4
 
     def get_queryset(self):
         """
         Returns a queryset of documents that are created by the current user and
         are in the "pending" status.
         """
-        return Document.objects.filter(employee=self.request.user)
+        return Document.objects.filter(employee=self.request.user).only(
+            "id", "document_type", "created_at", "thumbnail", "status"
+        )
 
 
-class ManagerDocumentListView(LoginRequiredMixin, RoleRequiredMixin, ListView):
+class ManagerDocumentListView(
+    LoginRequiredMixin, RoleRequiredMixin, KeysetPaginationMixin, ListView
+):
     """
     A view for displaying the documents that are available for assignment.
 
@@ -73,18 +154,35 @@ class ManagerDocumentListView(LoginRequiredMixin, RoleRequiredMixin, ListView):
     context_object_name = "documents"
     paginate_by = 5
     required_role = "manager"
+    total_count = "estimate"
+    # Counted with cold caches, as in EmployeeDocumentListView.
+    query_budget = 6
+    list_fields = (
+        "id", "document_type", "created_at", "thumbnail", "employee__username"
+    )
 
     def get_queryset(self):
         """
         Returns a queryset of documents that are in the "pending" status and are
         not assigned to any assistant.
         """
-        return Document.objects.filter(
-            status=Document.STATUS_PENDING, assigned_to__isnull=True
+        return (
+            Document.objects.filter(
+                status=Document.STATUS_PENDING, assigned_to__isnull=True
+            )
+            .select_related("employee")
+            .only(*self.list_fields)
         )
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["assistants"] = get_assistants_with_load()
+        return context
+
 
-class AssistantDocumentListView(LoginRequiredMixin, RoleRequiredMixin, ListView):
+class AssistantDocumentListView(
+    LoginRequiredMixin, RoleRequiredMixin, KeysetPaginationMixin, ListView
+):
     """
     A view for displaying the documents assigned to the assistant.
 
@@ -97,14 +195,23 @@ class AssistantDocumentListView(LoginRequiredMixin, RoleRequiredMixin, ListView)
     context_object_name = "documents"
     paginate_by = 5
     required_role = "assistant"
+    # Counted with cold caches, as in EmployeeDocumentListView.
+    query_budget = 4
+    list_fields = (
+        "id", "document_type", "created_at", "thumbnail", "employee__username"
+    )
 
     def get_queryset(self):
         """
         Returns a queryset of documents that are assigned to the assistant and
         are in the "pending" status.
         """
-        return Document.objects.filter(
-            status=Document.STATUS_PENDING, assigned_to=self.request.user
+        return (
+            Document.objects.filter(
+                status=Document.STATUS_PENDING, assigned_to=self.request.user
+            )
+            .select_related("employee")
+            .only(*self.list_fields)
         )
 
 
@@ -127,17 +234,121 @@ class DocumentDetailView(LoginRequiredMixin, DetailView):
         If the user is a manager or assistant, all documents are returned.
         If the user has another role, an empty queryset is returned.
         """
-        queryset = super().get_queryset()
-        if self.request.user.is_employee:
-            # Employees can only see their own documents
-            queryset = queryset.filter(employee=self.request.user)
-        elif self.request.user.is_manager or self.request.user.is_assistant:
-            # Managers and assistants can see all documents
-            queryset = queryset
-        else:
-            # Other roles can't see any documents
-            queryset = queryset.none()
-        return queryset
+        return super().get_queryset().visible_to(self.request.user)
+
+
+class DocumentFileView(LoginRequiredMixin, View):
+    """
+    Base view serving a file of a document.
+
+    The same visibility rules as in ``DocumentDetailView`` apply, so the file
+    of a document the user cannot see is answered with 404. Range and
+    conditional requests are supported, see ``documents.downloads.serve_file``.
+    """
+
+    file_field = None
+    content_type = None
+
+    def get(self, request, pk):
+        queryset = Document.objects.visible_to(request.user).only(
+            "id", self.file_field, "sha256"
+        )
+        document = get_object_or_404(queryset, pk=pk)
+        field_file = getattr(document, self.file_field)
+        if not field_file:
+            raise Http404("Файл не найден")
+        try:
+            etag = get_file_etag(field_file, self.get_sha256(document))
+        except FileNotFoundError:
+            raise Http404("Файл не найден")
+        return serve_file(
+            request,
+            field_file,
+            etag,
+            self.content_type,
+            as_attachment=self.as_attachment(),
+        )
+
+    def get_sha256(self, document):
+        return ""
+
+    def as_attachment(self):
+        return False
+
+
+class DocumentDownloadView(DocumentFileView):
+    """
+    A view for downloading the PDF file of a document.
+
+    Pass ``?download=1`` to get the file as an attachment.
+    """
+
+    file_field = "pdf_file"
+    content_type = "application/pdf"
+
+    def get_sha256(self, document):
+        return document.sha256
+
+    def as_attachment(self):
+        return bool(self.request.GET.get("download"))
+
+
+class DocumentThumbnailView(DocumentFileView):
+    """
+    A view serving the first page thumbnail of a document.
+    """
+
+    file_field = "thumbnail"
+    content_type = "image/png"
+
+
+class DocumentSearchView(LoginRequiredMixin, ListView):
+    """
+    A view for searching documents by text, status and creation date.
+
+    Only the documents visible to the current user are searched, following
+    the same rules as ``DocumentDetailView``. Results are ordered by
+    relevance when a text query is given, newest first otherwise.
+    """
+
+    model = Document
+    template_name = "documents/search_documents.html"
+    context_object_name = "documents"
+    paginate_by = 10
+
+    def get_queryset(self):
+        """
+        Returns the documents matching the search form.
+        """
+        queryset = (
+            Document.objects.visible_to(self.request.user)
+            .select_related("employee")
+            .defer("extracted_text", "search_vector")
+        )
+        self.form = DocumentSearchForm(self.request.GET)
+        if not self.form.is_valid():
+            return queryset.none()
+
+        data = self.form.cleaned_data
+        if data["status"]:
+            queryset = queryset.filter(status=data["status"])
+        if data["date_from"]:
+            queryset = queryset.filter(created_at__date__gte=data["date_from"])
+        if data["date_to"]:
+            queryset = queryset.filter(created_at__date__lte=data["date_to"])
+        if data["q"]:
+            return search_documents(queryset, data["q"])
+        return queryset.order_by("-created_at", "-id")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        params = self.request.GET.copy()
+        params.pop("page", None)
+        context["form"] = self.form
+        context["pagination_querystring"] = (
+            f"{params.urlencode()}&" if params else ""
+        )
+        return context
 
 
 class AssignDocumentView(LoginRequiredMixin, RoleRequiredMixin, UpdateView):
@@ -147,20 +358,45 @@ class AssignDocumentView(LoginRequiredMixin, RoleRequiredMixin, UpdateView):
     success_url = reverse_lazy("documents:manager_documents")
     required_role = "manager"
 
-    def form_valid(self, form):
-        assistant_id = self.request.POST.get("assistant")
-        if not assistant_id:
-            messages.error(self.request, "Вы должны выбрать помощника.")
-            return self.form_invalid(form)
-        self.object = form.save(commit=False)
-        self.object.assigned_to_id = assistant_id
-        self.object.save()
-        messages.success(self.request, "Документ назначен помощнику.")
-        notification_service = NotificationService()
-        notification_service.notify_user(
-            assistant_id, f"Вам назначен документ: {self.object.document_type}"
+    def post(self, request, *args, **kwargs):
+        """
+        Assigns the document with a single conditional UPDATE.
+
+        The update only succeeds if the document is still pending and has not
+        been changed since the form was displayed.
+        """
+        self.object = self.get_object(
+            Document.objects.only(
+                "id", "status", "version", "document_type", "assigned_to_id", "assigned_at"
+            )
         )
-        return super().form_valid(form)
+        assistant_id = get_selected_assistant_id(request)
+        if assistant_id is None:
+            messages.error(request, "Вы должны выбрать помощника.")
+            return HttpResponseRedirect(request.path)
+        self.object.version = get_expected_version(request, self.object)
+        notification_service = NotificationService()
+        try:
+            with transaction.atomic():
+                transition(
+                    self.object,
+                    Document.STATUS_PENDING,
+                    actor=request.user,
+                    assigned_to_id=assistant_id,
+                )
+                notification_service.enqueue(
+                    assistant_id, f"Вам назначен документ: {self.object.document_type}"
+                )
+        except InvalidTransition:
+            messages.error(request, "Документ уже рассмотрен.")
+        except TransitionConflict:
+            messages.error(
+                request, "Документ был изменен другим пользователем, попробуйте снова."
+            )
+            return HttpResponseRedirect(request.path)
+        else:
+            messages.success(request, "Документ назначен помощнику.")
+        return HttpResponseRedirect(self.get_success_url())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -168,7 +404,24 @@ class AssignDocumentView(LoginRequiredMixin, RoleRequiredMixin, UpdateView):
         return context
 
     def get_assistants(self):
-        return self.request.user.__class__.objects.filter(role="assistant")
+        return get_assistants_with_load()
+
+
+class AutoAssignDocumentsView(LoginRequiredMixin, RoleRequiredMixin, View):
+    """
+    A view that assigns all pending, unassigned documents to the least-loaded
+    assistants, see ``documents.assignment.AssignmentEngine``.
+    """
+
+    required_role = "manager"
+
+    def post(self, request):
+        assigned = AssignmentEngine().assign_all()
+        if assigned:
+            messages.success(request, f"Назначено документов: {assigned}.")
+        else:
+            messages.info(request, "Нет документов или помощников для назначения.")
+        return HttpResponseRedirect(reverse_lazy("documents:manager_documents"))
 
 
 class ReviewDocumentView(LoginRequiredMixin, RoleRequiredMixin, UpdateView):
@@ -225,25 +478,38 @@ class ReviewDocumentView(LoginRequiredMixin, RoleRequiredMixin, UpdateView):
         Returns:
             Response: The response object.
         """
-        self.object = self.get_object()
+        self.object = self.get_object(
+            Document.objects.only(
+                "id", "employee_id", "status", "version", "assigned_to_id", "assigned_at"
+            )
+        )
         action = request.POST.get("action")
-        user_id = self.object.employee.id
+        user_id = self.object.employee_id
 
         if action == "accept":
-            self.object.status = Document.STATUS_ACCEPTED
+            status = Document.STATUS_ACCEPTED
             message_text = "Ваш документ был принят."
         elif action == "reject":
-            self.object.status = Document.STATUS_REJECTED
+            status = Document.STATUS_REJECTED
             message_text = "Ваш документ был отклонен."
         else:
             raise PermissionDenied
 
-        self.object.save()
-
+        self.object.version = get_expected_version(request, self.object)
         notification_service = NotificationService()
-        notification_service.notify_user(user_id, message_text)
-
-        messages.success(request, "Статус документ был обновлен.")
+        try:
+            with transaction.atomic():
+                transition(self.object, status, actor=request.user)
+                notification_service.enqueue(user_id, message_text)
+        except InvalidTransition:
+            messages.error(request, "Документ уже рассмотрен.")
+        except TransitionConflict:
+            messages.error(
+                request, "Документ был изменен другим пользователем, попробуйте снова."
+            )
+            return HttpResponseRedirect(request.path)
+        else:
+            messages.success(request, "Статус документ был обновлен.")
         return HttpResponseRedirect(self.get_success_url())
 
 
@@ -255,3 +521,156 @@ class ManagerReviewDocumentView(ReviewDocumentView):
 class AssistantReviewDocumentView(ReviewDocumentView):
     success_url = reverse_lazy("documents:assistant_documents")
     required_role = "assistant"
+
+
+def get_selected_document_ids(request):
+    """
+    Returns the ids of the documents selected with the checkboxes of a list.
+    """
+    return [int(pk) for pk in request.POST.getlist("documents") if pk.isdigit()]
+
+
+class BulkAssignDocumentsView(LoginRequiredMixin, RoleRequiredMixin, View):
+    """
+    A view for assigning the documents selected in the manager list to one
+    assistant with a single UPDATE.
+    """
+
+    required_role = "manager"
+    success_url = reverse_lazy("documents:manager_documents")
+
+    def post(self, request):
+        document_ids = get_selected_document_ids(request)
+        if not document_ids:
+            messages.error(request, "Выберите хотя бы один документ.")
+        elif (assistant_id := get_selected_assistant_id(request)) is None:
+            messages.error(request, "Вы должны выбрать помощника.")
+        else:
+            assigned = bulk_assign(document_ids, assistant_id, actor=request.user)
+            messages.success(request, f"Назначено документов: {assigned}.")
+        return HttpResponseRedirect(self.success_url)
+
+
+class BulkReviewDocumentsView(LoginRequiredMixin, RoleRequiredMixin, View):
+    """
+    A view for accepting or rejecting the documents selected in a list with
+    a single UPDATE.
+
+    Documents that were reviewed in the meantime are skipped.
+    """
+
+    required_role = None
+    success_url = None
+
+    def get_queryset(self):
+        """
+        Returns the documents the current user may review.
+        """
+        return Document.objects.all()
+
+    def post(self, request):
+        action = request.POST.get("action")
+        if action == "accept":
+            status = Document.STATUS_ACCEPTED
+        elif action == "reject":
+            status = Document.STATUS_REJECTED
+        else:
+            raise PermissionDenied
+
+        document_ids = get_selected_document_ids(request)
+        if not document_ids:
+            messages.error(request, "Выберите хотя бы один документ.")
+        else:
+            reviewed = bulk_review(
+                self.get_queryset(), document_ids, status, actor=request.user
+            )
+            messages.success(request, f"Обновлен статус документов: {reviewed}.")
+        return HttpResponseRedirect(self.success_url)
+
+
+class ManagerBulkReviewDocumentsView(BulkReviewDocumentsView):
+    success_url = reverse_lazy("documents:manager_documents")
+    required_role = "manager"
+
+
+class AssistantBulkReviewDocumentsView(BulkReviewDocumentsView):
+    success_url = reverse_lazy("documents:assistant_documents")
+    required_role = "assistant"
+
+    def get_queryset(self):
+        return Document.objects.filter(assigned_to=self.request.user)
+
+
+class ManagerDashboardView(LoginRequiredMixin, RoleRequiredMixin, TemplateView):
+    """
+    A view displaying the throughput of the assistants over the last days.
+
+    Only the rollup tables maintained by ``documents.events`` are read, never
+    the documents or the events themselves.
+    """
+
+    template_name = "documents/dashboard.html"
+    required_role = "manager"
+    period_choices = (7, 30, 90)
+
+    def get_days(self):
+        days = self.request.GET.get("days", "")
+        days = int(days) if days.isdigit() else self.period_choices[0]
+        return days if days in self.period_choices else self.period_choices[0]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        days = self.get_days()
+        since = timezone.localdate() - timedelta(days=days - 1)
+
+        rows = list(
+            AssistantDailyStats.objects.filter(date__gte=since)
+            .values("assistant_id", "assistant__username")
+            .annotate(
+                assigned=Sum("assigned_count"),
+                accepted=Sum("accepted_count"),
+                rejected=Sum("rejected_count"),
+                decision_seconds=Sum("decision_seconds"),
+                timed_decisions=Sum("timed_decisions"),
+            )
+            .order_by("assistant__username")
+        )
+        histograms = defaultdict(dict)
+        for bucket in (
+            DecisionTimeBucket.objects.filter(date__gte=since)
+            .values("assistant_id", "bucket")
+            .annotate(total=Sum("count"))
+        ):
+            histograms[bucket["assistant_id"]][bucket["bucket"]] = bucket["total"]
+        for row in rows:
+            row["decided"] = row["accepted"] + row["rejected"]
+            row["average"] = (
+                format_duration(row["decision_seconds"] / row["timed_decisions"])
+                if row["timed_decisions"]
+                else None
+            )
+            histogram = histograms.get(row["assistant_id"])
+            if not histogram:
+                row["median"] = None
+            else:
+                bound = get_median_bound(histogram)
+                row["median"] = (
+                    f"≤ {format_duration(bound)}"
+                    if bound
+                    else f"> {format_duration(DECISION_BUCKETS[-2])}"
+                )
+
+        context["rows"] = rows
+        context["daily"] = (
+            AssistantDailyStats.objects.filter(date__gte=since)
+            .values("date")
+            .annotate(
+                assigned=Sum("assigned_count"),
+                accepted=Sum("accepted_count"),
+                rejected=Sum("rejected_count"),
+            )
+            .order_by("-date")
+        )
+        context["days"] = days
+        context["period_choices"] = self.period_choices
+        return context
@@ -0,0 +1,221 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+OTHER = "[other]"
+
+# Seconds; suits request latency.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Metric:
+    """
+    A named metric with a fixed set of labels.
+
+    The number of label combinations (series) is capped by
+    ``METRICS_MAX_SERIES``: once reached, new combinations are counted
+    under a single series with every label set to ``"[other]"``, so that
+    unexpected label values cannot grow the memory use without bound.
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    def _get(self, labels):
+        """
+        Returns the value of the series for ``labels``; the caller must hold
+        the lock.
+        """
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        value = self._series.get(key)
+        if value is None:
+            if len(self._series) >= settings.METRICS_MAX_SERIES:
+                key = (OTHER,) * len(self.labelnames)
+                value = self._series.get(key)
+            if value is None:
+                value = self._series[key] = self._new_value()
+        return value
+
+    def _samples(self):
+        """
+        Yields ``(suffix, label values, extra labels, value)`` tuples.
+        """
+        raise NotImplementedError
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        with self._lock:
+            samples = list(self._samples())
+        for suffix, values, extra, value in samples:
+            labels = _format_labels(self.labelnames, values, extra)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    A value that only goes up, e.g. the number of sent messages.
+    """
+
+    type = "counter"
+
+    def _new_value(self):
+        return [0]
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            self._get(labels)[0] += amount
+
+    def _samples(self):
+        if not self._series and not self.labelnames:
+            yield "", (), (), 0
+        for key, value in self._series.items():
+            yield "", key, (), value[0]
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down, e.g. the number of open connections.
+    """
+
+    type = "gauge"
+
+    def _new_value(self):
+        return [0]
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            self._get(labels)[0] += amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._get(labels)[0] = value
+
+    _samples = Counter._samples
+
+
+class Histogram(Metric):
+    """
+    Counts observed values, e.g. latencies, in cumulative buckets.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def _new_value(self):
+        # Per-bucket counts, then the sum of the observed values.
+        return [0] * len(self.buckets) + [0.0]
+
+    def observe(self, value, **labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._get(labels)
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the duration of the block, in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        for key, value in self._series.items():
+            count = 0
+            for bound, bucket_count in zip(self.buckets, value):
+                count += bucket_count
+                yield "_bucket", key, (("le", _format_value(float(bound))),), count
+            yield "_sum", key, (), value[-1]
+            yield "_count", key, (), count
+
+
+class Registry:
+    """
+    Holds the metrics of the process and renders them in the Prometheus
+    text format.
+
+    The values are kept per process: with several workers, each one must
+    be scraped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(
+                    name, documentation, labelnames, **kwargs
+                )
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"{name} is already registered differently")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "".join(metric.render() + "\n" for metric in metrics)
+
+
+registry = Registry()
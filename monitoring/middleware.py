@@ -0,0 +1,137 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from monitoring.metrics import registry
+from monitoring.profiling import profiler
+from monitoring.queries import QueryBudgetExceeded, QueryRecorder
+
+
+logger = logging.getLogger(__name__)
+
+HTTP_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+REQUEST_LATENCY = registry.histogram(
+    "dms_http_request_duration_seconds",
+    "Time spent handling a request, by URL name.",
+    ["view", "method", "status"],
+)
+REQUEST_QUERIES = registry.histogram(
+    "dms_http_request_queries",
+    "Database queries run by a request, by URL name.",
+    ["view"],
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100),
+)
+
+
+def get_view_class(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    return getattr(match.func, "view_class", None)
+
+
+def get_view_name(request):
+    """
+    Returns the URL name of the request's view, a label with a bounded set
+    of values, unlike the path.
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "[unresolved]"
+    return match.view_name
+
+
+class QueryBudgetMiddleware:
+    """
+    Counts and times the queries of every request.
+
+    Views can declare the maximum number of queries they may run in a
+    ``query_budget`` class attribute. A request exceeding it, or repeating
+    the same query shape ``QUERY_REPEAT_THRESHOLD`` times (an N+1 pattern),
+    is logged as a warning, or raises ``QueryBudgetExceeded`` when
+    ``QUERY_BUDGET_STRICT`` is on, as in tests.
+
+    With ``DEBUG`` on the responses carry ``X-Query-Count`` and
+    ``X-Query-Time`` headers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        self.check(request, recorder)
+        REQUEST_QUERIES.observe(recorder.count, view=get_view_name(request))
+        if settings.DEBUG:
+            response.headers["X-Query-Count"] = str(recorder.count)
+            response.headers["X-Query-Time"] = f"{recorder.duration * 1000:.1f}ms"
+        return response
+
+    def check(self, request, recorder):
+        view_class = get_view_class(request)
+        name = view_class.__name__ if view_class else request.path
+        problems = []
+        budget = getattr(view_class, "query_budget", None)
+        if budget is not None and recorder.count > budget:
+            problems.append(f"{recorder.count} queries, budget is {budget}")
+        threshold = getattr(settings, "QUERY_REPEAT_THRESHOLD", 5)
+        for shape, count in recorder.get_repeated(threshold):
+            problems.append(f"query repeated {count} times: {shape}")
+        if not problems:
+            return
+        message = f"{name}: " + "; ".join(problems)
+        if getattr(settings, "QUERY_BUDGET_STRICT", False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a ``PROFILING_SAMPLE_RATE`` fraction of the requests with
+    ``monitoring.profiling.profiler``, filing the stacks under the view.
+
+    Removed from the middleware chain when the sample rate is 0.
+    """
+
+    def __init__(self, get_response):
+        if not profiler.sample_rate:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiler.should_profile():
+            return self.get_response(request)
+        with profiler.profile("[unresolved]") as sample:
+            response = self.get_response(request)
+            view_class = get_view_class(request)
+            if view_class is not None:
+                sample.label = view_class.__name__
+            elif getattr(request, "resolver_match", None) is not None:
+                sample.label = request.resolver_match.view_name
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Records the latency of every request in ``dms_http_request_duration_seconds``,
+    labelled by URL name, method and status class.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        method = request.method if request.method in HTTP_METHODS else "OTHER"
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            view=get_view_name(request),
+            method=method,
+            status=f"{response.status_code // 100}xx",
+        )
+        return response
@@ -0,0 +1,240 @@
+import asyncio
+import functools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+OTHER = "[other]"
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _collapse(frames, max_depth):
+    """
+    Joins frames, innermost last, into a collapsed stack as used by
+    flamegraph.pl and speedscope: ``"a.py:outer;b.py:inner"``.
+    """
+    return ";".join(_frame_name(frame) for frame in frames[-max_depth:])
+
+
+def _thread_frames(frame):
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _coroutine_frames(coroutine):
+    """
+    Returns the frames of a suspended coroutine and of the awaitables it is
+    waiting on, outermost first.
+    """
+    frames = []
+    while coroutine is not None:
+        frame = getattr(coroutine, "cr_frame", None) or getattr(coroutine, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coroutine = getattr(coroutine, "cr_await", None) or getattr(
+            coroutine, "gi_yieldfrom", None
+        )
+    return frames
+
+
+class Sample:
+    """
+    The stacks collected for one profiled request or consumer handler.
+    """
+
+    def __init__(self, label, thread_id, task=None):
+        self.label = label
+        self.thread_id = thread_id
+        self.task = task
+        self.stacks = Counter()
+
+
+class Profiler:
+    """
+    A sampling profiler for requests and consumer handlers.
+
+    A background thread captures the call stack of every profiled request or
+    handler each ``PROFILING_INTERVAL`` seconds. Stacks are aggregated per
+    view in memory, at most ``PROFILING_MAX_STACKS`` distinct stacks per view
+    and ``PROFILING_MAX_VIEWS`` views; the rest is counted as ``[other]``.
+
+    Only a ``PROFILING_SAMPLE_RATE`` fraction of the requests is profiled.
+    With a rate of 0, the default, nothing is started and the profiling
+    hooks return immediately.
+
+    The data is kept per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {}
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.reset()
+
+    @property
+    def sample_rate(self):
+        return getattr(settings, "PROFILING_SAMPLE_RATE", 0)
+
+    def should_profile(self):
+        rate = self.sample_rate
+        return rate > 0 and random.random() < rate
+
+    def reset(self):
+        with self._lock:
+            self.stacks = {}
+            self.calls = Counter()
+            self.samples = Counter()
+
+    @contextmanager
+    def profile(self, label="", task=None):
+        """
+        Profiles the block, which runs in the current thread or, for
+        coroutines, in ``task``.
+
+        Yields:
+            Sample: The sample; set its ``label`` before the block ends to
+            file it under a name known only at the end, e.g. the view.
+        """
+        sample = Sample(label, threading.get_ident(), task)
+        self._start()
+        with self._lock:
+            self._active[id(sample)] = sample
+        self._wakeup.set()
+        try:
+            yield sample
+        finally:
+            with self._lock:
+                del self._active[id(sample)]
+                self._merge(sample)
+
+    def _merge(self, sample):
+        label = sample.label
+        if label not in self.stacks and len(self.stacks) >= settings.PROFILING_MAX_VIEWS:
+            label = OTHER
+        stacks = self.stacks.setdefault(label, Counter())
+        max_stacks = settings.PROFILING_MAX_STACKS
+        for stack, count in sample.stacks.items():
+            if stack not in stacks and len(stacks) >= max_stacks:
+                stack = OTHER
+            stacks[stack] += count
+        self.calls[label] += 1
+        self.samples[label] += sum(sample.stacks.values())
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="profiler", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._wakeup.clear()
+                    continue
+            self._sample(active)
+            time.sleep(settings.PROFILING_INTERVAL)
+
+    def _sample(self, active):
+        max_depth = settings.PROFILING_MAX_DEPTH
+        thread_frames = sys._current_frames()
+        for sample in active:
+            if sample.task is None:
+                frame = thread_frames.get(sample.thread_id)
+                frames = _thread_frames(frame) if frame is not None else []
+            else:
+                if asyncio.current_task(sample.task.get_loop()) is sample.task:
+                    # Running: the thread stack holds the innermost frames.
+                    frame = thread_frames.get(sample.thread_id)
+                    frames = _thread_frames(frame) if frame is not None else []
+                else:
+                    frames = _coroutine_frames(sample.task.get_coro())
+            if frames:
+                stack = _collapse(frames, max_depth)
+                with self._lock:
+                    # The block may have ended and the sample been merged.
+                    if id(sample) in self._active:
+                        sample.stacks[stack] += 1
+
+    def get_top_functions(self, label, limit=20):
+        """
+        Returns the functions most often seen in the samples of a view.
+
+        Returns:
+            list[tuple[str, int, int]]: The function, the number of samples
+            in which it was running (self) and in which it was on the stack
+            (total), sorted by self samples.
+        """
+        own = Counter()
+        total = Counter()
+        with self._lock:
+            stacks = dict(self.stacks.get(label, {}))
+        for stack, count in stacks.items():
+            functions = stack.split(";")
+            own[functions[-1]] += count
+            for function in set(functions):
+                total[function] += count
+        functions = sorted(total, key=lambda function: (-own[function], -total[function]))
+        return [(function, own[function], total[function]) for function in functions[:limit]]
+
+    def get_collapsed(self, label):
+        """
+        Returns the stacks of a view in collapsed format, one
+        ``"stack count"`` line per stack.
+        """
+        with self._lock:
+            stacks = dict(self.stacks.get(label, {}))
+        return "\n".join(
+            f"{stack} {count}"
+            for stack, count in sorted(stacks.items(), key=lambda item: -item[1])
+        )
+
+
+profiler = Profiler()
+
+
+def profile_handler(label):
+    """
+    Decorator profiling an async consumer handler under ``label``.
+
+    Usage::
+
+        @profile_handler("NotificationConsumer.connect")
+        async def connect(self):
+            ...
+    """
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(*args, **kwargs):
+            if not profiler.should_profile():
+                return await handler(*args, **kwargs)
+            with profiler.profile(label, task=asyncio.current_task()):
+                return await handler(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,115 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+
+IN_LIST_RE = re.compile(r"\bIN \((?:%s, )*%s\)")
+NUMBER_RE = re.compile(r"\b\d+\b")
+
+_repeats_allowed = ContextVar("repeats_allowed", default=False)
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised when a view runs more queries than its ``query_budget``, or
+    repeats a query, and ``QUERY_BUDGET_STRICT`` is on.
+    """
+
+
+@contextmanager
+def allow_repeated_queries():
+    """
+    Queries run in the block are not reported as repeated.
+
+    For loops running a statement per item whose number is bounded by
+    design, e.g. one per assistant, which would otherwise look like an N+1
+    pattern. The queries still count towards the budgets.
+    """
+    token = _repeats_allowed.set(True)
+    try:
+        yield
+    finally:
+        _repeats_allowed.reset(token)
+
+
+def get_sql_shape(sql):
+    """
+    Returns the SQL of a query with the parts that vary between the queries
+    of an N+1 pattern (parameter lists and literal numbers) collapsed.
+    """
+    sql = IN_LIST_RE.sub("IN (...)", sql)
+    return NUMBER_RE.sub("N", sql)
+
+
+class QueryRecorder:
+    """
+    Records the queries run on every database connection while it is active.
+
+    Usage::
+
+        with QueryRecorder() as recorder:
+            ...
+        recorder.count, recorder.duration, recorder.get_repeated(3)
+
+    Unlike ``CaptureQueriesContext`` it does not need ``DEBUG`` and only
+    keeps the SQL and the duration of each query.
+    """
+
+    def __init__(self):
+        self.queries = []
+        # Indexes in ``queries`` of those run in allow_repeated_queries().
+        self.repeats_allowed = set()
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if _repeats_allowed.get():
+                self.repeats_allowed.add(len(self.queries))
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        """
+        The total time spent in the database, in seconds.
+        """
+        return sum(duration for _, duration in self.queries)
+
+    def get_repeated(self, threshold):
+        """
+        Returns the query shapes run at least ``threshold`` times, which
+        usually means a related object is loaded once per row.
+
+        Returns:
+            list[tuple[str, int]]: The shapes and their counts, most repeated
+            first.
+        """
+        shapes = Counter(
+            get_sql_shape(sql)
+            for index, (sql, _) in enumerate(self.queries)
+            if index not in self.repeats_allowed
+        )
+        return [
+            (shape, count)
+            for shape, count in shapes.most_common()
+            if count >= threshold
+        ]
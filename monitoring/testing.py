@@ -0,0 +1,44 @@
+from django.conf import settings
+
+from monitoring.queries import QueryRecorder
+
+
+class assert_max_queries:
+    """
+    Context manager failing a test when the block runs more than ``budget``
+    queries or repeats a query shape ``repeat_threshold`` times.
+
+    Usage::
+
+        with assert_max_queries(ManagerDocumentListView.query_budget):
+            client.get(reverse("documents:manager_documents"))
+
+    Run the whole test suite with ``QUERY_BUDGET_STRICT = True`` to enforce
+    the ``query_budget`` of every view through ``QueryBudgetMiddleware``.
+    """
+
+    def __init__(self, budget, repeat_threshold=None):
+        self.budget = budget
+        if repeat_threshold is None:
+            repeat_threshold = getattr(settings, "QUERY_REPEAT_THRESHOLD", 5)
+        self.repeat_threshold = repeat_threshold
+        self.recorder = QueryRecorder()
+
+    def __enter__(self):
+        self.recorder.__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.recorder.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        problems = []
+        if self.recorder.count > self.budget:
+            problems.append(
+                f"{self.recorder.count} queries, budget is {self.budget}:\n"
+                + "\n".join(sql for sql, _ in self.recorder.queries)
+            )
+        for shape, count in self.recorder.get_repeated(self.repeat_threshold):
+            problems.append(f"query repeated {count} times: {shape}")
+        if problems:
+            raise AssertionError("\n".join(problems))
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_http_methods
+
+from monitoring.metrics import registry
+from monitoring.profiling import profiler
+
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def profiling_view(request):
+    """
+    Shows the hottest functions of every profiled view.
+
+    ``?label=<view>&format=collapsed`` returns the stacks of a view in
+    collapsed format, for flamegraph.pl or speedscope. A POST clears the
+    collected data.
+    """
+    if request.method == "POST":
+        profiler.reset()
+        return redirect("profiling")
+
+    label = request.GET.get("label")
+    if label is not None and request.GET.get("format") == "collapsed":
+        return HttpResponse(
+            profiler.get_collapsed(label), content_type="text/plain; charset=utf-8"
+        )
+
+    limit = request.GET.get("limit", "")
+    limit = int(limit) if limit.isdigit() else 20
+    views = [
+        {
+            "label": name,
+            "calls": profiler.calls[name],
+            "samples": profiler.samples[name],
+            "functions": profiler.get_top_functions(name, limit),
+        }
+        for name in sorted(list(profiler.stacks), key=lambda name: -profiler.samples[name])
+    ]
+    context = {
+        **admin.site.each_context(request),
+        "title": "Профилирование",
+        "views": views,
+        "sample_rate": profiler.sample_rate,
+    }
+    return render(request, "monitoring/profiling.html", context)
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """
+    Exports the metrics of the process in the Prometheus text format.
+
+    Readable with ``Authorization: Bearer <METRICS_TOKEN>`` or by staff users.
+    """
+    token = settings.METRICS_TOKEN
+    header = request.headers.get("Authorization", "")
+    authorized = bool(token) and constant_time_compare(header, f"Bearer {token}")
+    if not authorized and not request.user.is_staff:
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
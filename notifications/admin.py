@@ -1,4 +1,6 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationArchive, NotificationOutbox
 
-admin.site.register(Notification)
\ No newline at end of file
+admin.site.register(Notification)
+admin.site.register(NotificationOutbox)
+admin.site.register(NotificationArchive)
@@ -1,16 +1,68 @@
-from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from django.conf import settings
+from urllib.parse import parse_qs
+import asyncio
 import json
 
+from monitoring.metrics import registry
+from monitoring.profiling import profile_handler
+from notifications.models import Notification
+from notifications.presence import presence
+from notifications.utils.encoding import dumps
+
+
+CONNECTIONS = registry.gauge(
+    "dms_websocket_connections",
+    "Open NotificationConsumer connections.",
+)
+DROPPED = registry.counter(
+    "dms_websocket_dropped_notifications_total",
+    "Notifications dropped because the batch buffer was full.",
+)
+STALLED = registry.counter(
+    "dms_websocket_stalled_closes_total",
+    "Connections closed because the client stopped acknowledging frames.",
+)
+
+
 class NotificationConsumer(AsyncWebsocketConsumer):
     """
     Consumer to handle websocket connections for notifications.
+
+    Clients connecting with ``?batch=1`` receive notifications coalesced into
+    JSON arrays: events arriving within ``NOTIFICATIONS_WS_BATCH_WINDOW``
+    seconds are sent as one frame.
+
+    Batching clients acknowledge the frames they have handled by sending
+    ``{"type": "ack", "frames": n}``, ``n`` being the number of frames
+    received on the connection. ``send`` does not wait for the client, so
+    these acknowledgements are how a slow client is detected: while
+    ``NOTIFICATIONS_WS_MAX_UNACKED`` frames are unacknowledged, events are
+    kept in the buffer instead of being sent. The buffer holds at most
+    ``NOTIFICATIONS_WS_BUFFER_SIZE`` events; the oldest ones are dropped and
+    replaced by a single ``{"type": "dropped", "count": n}`` entry, and the
+    client reloads its list. A client staying behind for more than
+    ``NOTIFICATIONS_WS_STALL_TIMEOUT`` seconds is disconnected, and replays
+    what it missed when it reconnects.
+
+    Clients reconnecting with ``?last_id=<id>`` first receive the
+    notifications saved after that id, at most ``NOTIFICATIONS_REPLAY_LIMIT``
+    of them, in one ``send_notification`` event flagged with ``replay``.
+    The group is joined before the replay query, so a notification sent in
+    between may arrive twice; clients deduplicate by ``id``.
     """
 
+    batch = False
+    flush_task = None
+    frames_sent = 0
+    frames_acked = 0
+    stalled_since = None
+
+    @profile_handler("NotificationConsumer.connect")
     async def connect(self):
         """
         Called when a websocket connection is initiated.
-        Updates the user's online status in the database.
+        Registers the connection in the presence tracker.
         """
         self.user_id = self.scope["user"].id
         if self.scope["user"].is_anonymous:
@@ -24,38 +76,167 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 self.channel_name
             )
             await self.accept()
+            CONNECTIONS.inc()
+
+            query = parse_qs(self.scope.get("query_string", b"").decode())
+            self.batch = query.get("batch") == ["1"]
+            self.buffer = []
+            self.dropped = 0
 
-            # Update user status in database
-            await self.update_user_status(self.user_id, is_online=True)
+            await presence.connect(self.user_id)
             await self.send_user_status(self.user_id, is_online=True)
 
+            last_id = query.get("last_id", [""])[0]
+            if last_id.isdigit():
+                await self.replay(int(last_id))
+
+    async def replay(self, last_id):
+        """
+        Sends the notifications saved after ``last_id``.
+
+        Args:
+            last_id (int): The id of the last notification the client has seen.
+        """
+        limit = settings.NOTIFICATIONS_REPLAY_LIMIT
+        rows = [
+            row
+            async for row in Notification.objects.filter(
+                user_id=self.user_id, id__gt=last_id
+            )
+            .order_by("-id")
+            .values("id", "message")[: limit + 1]
+        ]
+        if not rows:
+            return
+        truncated = len(rows) > limit
+        rows = rows[:limit][::-1]
+        payload = {
+            "type": "send_notification",
+            "message": rows[-1]["message"],
+            "messages": [row["message"] for row in rows],
+            "id": rows[-1]["id"],
+            "ids": [row["id"] for row in rows],
+            "replay": True,
+            "truncated": truncated,
+        }
+        await self.send_frame([payload] if self.batch else payload)
+
     async def disconnect(self, close_code):
         """
         Called when the websocket connection is closed.
-        Updates the user's online status in the database.
+        Unregisters the connection from the presence tracker.
         """
+        if not hasattr(self, "group_name"):
+            return
+
+        CONNECTIONS.dec()
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+
         # Remove user from WebSocket group
         await self.channel_layer.group_discard(
-            "notifications",
+            self.group_name,
             self.channel_name
         )
 
-        # Update user status in database
-        await self.update_user_status(self.user_id, is_online=False)
-        await self.send_user_status(self.user_id, is_online=False)
+        await presence.disconnect(self.user_id)
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """
+        Handles messages sent by the client.
+
+        The client sends ``{"type": "heartbeat"}`` periodically to keep its
+        presence alive, and ``{"type": "ack", "frames": n}`` in batch mode.
+        """
+        try:
+            data = json.loads(text_data or "")
+        except ValueError:
+            return
+        if not isinstance(data, dict):
+            return
+        if data.get("type") == "heartbeat":
+            await presence.heartbeat(self.user_id)
+        elif data.get("type") == "ack" and isinstance(data.get("frames"), int):
+            self.frames_acked = max(
+                self.frames_acked, min(data["frames"], self.frames_sent)
+            )
+            if not self.is_behind():
+                self.stalled_since = None
+                if (self.buffer or self.dropped) and self.flush_task is None:
+                    self.flush_task = asyncio.create_task(self.flush_later())
+
+    def is_behind(self):
+        """
+        Returns whether the client has too many unacknowledged frames to be
+        sent another one.
+        """
+        unacked = self.frames_sent - self.frames_acked
+        return unacked >= settings.NOTIFICATIONS_WS_MAX_UNACKED
 
+    async def send_frame(self, data):
+        """
+        Encodes and sends one frame, counting it for the acknowledgements.
+        """
+        self.frames_sent += 1
+        await self.send(text_data=dumps(data))
+
+    @profile_handler("NotificationConsumer.send_notification")
     async def send_notification(self, event):
         """
         Sends a notification to the websocket.
 
         Args:
             event (dict): The event data containing the message to send.
+                Coalesced events also carry all their messages in
+                ``messages``.
         """
-        message = event["message"]
-        await self.send(text_data=json.dumps({
-            "message": message,
+        payload = {
+            "message": event["message"],
             "type": "send_notification",
-        }))
+        }
+        for key in ("messages", "id", "ids"):
+            if key in event:
+                payload[key] = event[key]
+        if not self.batch:
+            await self.send_frame(payload)
+            return
+
+        limit = settings.NOTIFICATIONS_WS_BUFFER_SIZE
+        self.buffer.append(payload)
+        if len(self.buffer) > limit:
+            DROPPED.inc(len(self.buffer) - limit)
+            self.dropped += len(self.buffer) - limit
+            del self.buffer[: len(self.buffer) - limit]
+        if self.is_behind():
+            now = asyncio.get_running_loop().time()
+            if self.stalled_since is None:
+                self.stalled_since = now
+            elif now - self.stalled_since > settings.NOTIFICATIONS_WS_STALL_TIMEOUT:
+                STALLED.inc()
+                self.buffer = []
+                await self.close()
+            return
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_later())
+
+    async def flush_later(self):
+        """
+        Sends the buffered events once the batching window is over.
+
+        Events arriving while a frame is being sent are collected in the
+        buffer and sent in the next frame. Sending stops while the client is
+        behind; the next acknowledgement resumes it.
+        """
+        try:
+            await asyncio.sleep(settings.NOTIFICATIONS_WS_BATCH_WINDOW)
+            while (self.buffer or self.dropped) and not self.is_behind():
+                frame, self.buffer = self.buffer, []
+                if self.dropped:
+                    frame.insert(0, {"type": "dropped", "count": self.dropped})
+                    self.dropped = 0
+                await self.send_frame(frame)
+        finally:
+            self.flush_task = None
 
     async def send_user_status(self, user_id, is_online):
         """
@@ -65,28 +246,8 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             user_id (int): The ID of the user.
             is_online (bool): Whether the user is online.
         """
-        await self.send(text_data=json.dumps({
+        await self.send_frame({
             "user_id": user_id,
             "is_online": is_online,
             "type": "user_status",
-        }))
-
-    @staticmethod
-    async def update_user_status(user_id, is_online):
-        """
-        Updates the user's online status in the database.
-
-        Args:
-            user_id (int): The ID of the user.
-            is_online (bool): Whether the user is online.
-        """
-        from users.models import User
-        from asgiref.sync import sync_to_async
-
-        @sync_to_async
-        def update_status():
-            user = User.objects.get(id=user_id)
-            user.is_online = is_online
-            user.save(update_fields=["is_online"])
-
-        await update_status()
+        })
@@ -0,0 +1,114 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from channels.layers import InMemoryChannelLayer
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from common.stats import percentile
+from notifications.utils import NotificationService
+
+
+USERNAME_PREFIX = "bench_notify_"
+
+
+class Command(BaseCommand):
+    """
+    Compare the sync and the async NotificationService paths under load.
+
+    Synthetic users are created for the run and deleted afterwards, together
+    with the notifications written for them.
+    """
+
+    help = "Сравнивает синхронный и асинхронный пути отправки уведомлений."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument(
+            "--in-memory-layer",
+            action="store_true",
+            help="Use InMemoryChannelLayer instead of the configured channel layer.",
+        )
+
+    def handle(self, *args, **options):
+        channel_layer = InMemoryChannelLayer() if options["in_memory_layer"] else None
+        service = NotificationService(channel_layer=channel_layer)
+        user_ids = self._create_users(options["users"])
+        jobs = [user_ids[i % len(user_ids)] for i in range(options["requests"])]
+        try:
+            results = {
+                "sync": self._run_sync(service, jobs, options["concurrency"]),
+                "async": asyncio.run(
+                    self._run_async(service, jobs, options["concurrency"])
+                ),
+            }
+        finally:
+            get_user_model().objects.filter(
+                username__startswith=USERNAME_PREFIX
+            ).delete()
+
+        for name, (elapsed, latencies) in results.items():
+            latencies.sort()
+            self.stdout.write(
+                f"{name:>5}: {len(latencies)} notifications in {elapsed:.2f}s "
+                f"({len(latencies) / elapsed:.1f}/s), "
+                f"mean {statistics.mean(latencies):.1f}ms, "
+                f"p50 {percentile(latencies, 50):.1f}ms, "
+                f"p95 {percentile(latencies, 95):.1f}ms, "
+                f"p99 {percentile(latencies, 99):.1f}ms"
+            )
+
+    def _create_users(self, count):
+        User = get_user_model()
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        User.objects.bulk_create(
+            [User(username=f"{USERNAME_PREFIX}{i}") for i in range(count)]
+        )
+        return list(
+            User.objects.filter(username__startswith=USERNAME_PREFIX).values_list(
+                "id", flat=True
+            )
+        )
+
+    def _run_sync(self, service, jobs, concurrency):
+        def worker(user_ids):
+            latencies = []
+            try:
+                for user_id in user_ids:
+                    started = time.perf_counter()
+                    service.notify_user(user_id, "benchmark")
+                    latencies.append((time.perf_counter() - started) * 1000)
+            finally:
+                connections.close_all()
+            return latencies
+
+        chunks = [jobs[i::concurrency] for i in range(concurrency)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = [
+                latency
+                for chunk_latencies in executor.map(worker, chunks)
+                for latency in chunk_latencies
+            ]
+        return time.perf_counter() - started, latencies
+
+    async def _run_async(self, service, jobs, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def notify(user_id):
+            async with semaphore:
+                started = time.perf_counter()
+                await service.anotify_user(user_id, "benchmark")
+                return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(notify(user_id) for user_id in jobs))
+        elapsed = time.perf_counter() - started
+        await sync_to_async(connections.close_all)()
+        return elapsed, list(latencies)
@@ -0,0 +1,58 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.utils import OutboxDispatcher
+
+
+class Command(BaseCommand):
+    """
+    Drain the notification outbox.
+
+    Runs forever by default, polling the outbox every ``--interval`` seconds
+    when it is empty. Several instances may run at the same time.
+    """
+
+    help = "Доставляет уведомления из очереди исходящих уведомлений."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--max-attempts", type=int, default=5)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between polls when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the outbox once and exit.",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print the queue depth metrics as JSON and exit.",
+        )
+
+    def handle(self, *args, **options):
+        dispatcher = OutboxDispatcher(
+            batch_size=options["batch_size"],
+            max_attempts=options["max_attempts"],
+        )
+        if options["stats"]:
+            self.stdout.write(json.dumps(dispatcher.get_stats()))
+            return
+
+        while True:
+            dispatched = dispatcher.dispatch_batch()
+            if dispatched and options["verbosity"] >= 2:
+                self.stdout.write(
+                    f"Dispatched {dispatched} rows, queue: "
+                    f"{json.dumps(dispatcher.get_stats())}"
+                )
+            if dispatched < options["batch_size"]:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
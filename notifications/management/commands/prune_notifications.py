@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from notifications.utils import prune_read_notifications
+
+
+class Command(BaseCommand):
+    """
+    Remove old read notifications.
+
+    Intended to be run periodically (e.g. from cron). With ``--archive`` the
+    rows are moved to ``NotificationArchive`` instead of being dropped.
+    """
+
+    help = "Удаляет или архивирует старые прочитанные уведомления."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.NOTIFICATIONS_RETENTION_DAYS,
+            help="Prune read notifications older than this many days.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of notifications deleted per transaction.",
+        )
+        parser.add_argument(
+            "--archive",
+            action="store_true",
+            help="Copy the notifications to the archive table before deleting them.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to wait between batches.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = prune_read_notifications(
+            options["days"],
+            batch_size=options["batch_size"],
+            archive=options["archive"],
+            sleep=options["sleep"],
+        )
+        elapsed = time.monotonic() - started
+        action = "Archived" if options["archive"] else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} {total} notifications older than {options['days']} days "
+                f"in {elapsed:.2f}s."
+            )
+        )
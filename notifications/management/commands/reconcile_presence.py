@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from notifications.presence import presence
+
+
+class Command(BaseCommand):
+    """
+    Mark users without an open websocket connection as offline.
+
+    Intended to be run periodically (e.g. from cron) and after deploys.
+    """
+
+    help = "Сбрасывает статус «онлайн» пользователей без открытых соединений."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = presence.reconcile(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Marked {updated} users offline."))
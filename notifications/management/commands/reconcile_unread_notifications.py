@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from notifications.utils import reconcile_unread_counts
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the cached unread notification counters from the database.
+
+    Intended to be run periodically (e.g. from cron) to correct any drift of
+    the incrementally maintained counters.
+    """
+
+    help = "Пересчитывает кэшированные счетчики непрочитанных уведомлений."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Id of the user to reconcile. May be repeated. Defaults to all users.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of users reconciled per aggregated query.",
+        )
+
+    def handle(self, *args, **options):
+        user_ids = options["user_ids"]
+        if user_ids is None:
+            User = get_user_model()
+            user_ids = (
+                User.objects.order_by("pk").values_list("pk", flat=True).iterator()
+            )
+
+        batch_size = options["batch_size"]
+        total = 0
+        batch = []
+        for user_id in user_ids:
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                total += reconcile_unread_counts(batch)
+                batch = []
+        if batch:
+            total += reconcile_unread_counts(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {total} unread counters."))
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 20:29
+
+from django.db import migrations, models
+
+from common.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # The index is built without locking the table on PostgreSQL.
+    atomic = False
+
+    dependencies = [
+        ('notifications', '0003_notification_retention'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(fields=['user', '-id'], name='notif_user_id_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Notification(models.Model):
     user = models.ForeignKey(
@@ -13,7 +14,72 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # The notification list and the unread count.
+            models.Index(
+                fields=['user', 'is_read', '-created_at'],
+                name='notif_user_read_created_idx',
+            ),
+            # The keyset paginated inbox.
+            models.Index(fields=['user', '-id'], name='notif_user_id_idx'),
+        ]
 
+    def __str__(self):
+        return f"{self.user.username}: {self.message}"
+
+
+class NotificationOutbox(models.Model):
+    """
+    A notification waiting to be delivered by the outbox dispatcher.
+
+    Rows are written in the same transaction as the change that caused the
+    notification, and are turned into ``Notification`` rows and websocket
+    messages by the ``dispatch_notifications`` management command.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    message = models.CharField(max_length=255)
+    ms_type = models.CharField(max_length=50, default='send_notification')
+    is_saved = models.BooleanField(default=False)
+    # Set once the notification row has been written.
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['available_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.message}"
+
+
+class NotificationArchive(models.Model):
+    """
+    A read notification moved out of ``Notification`` by the
+    ``prune_notifications --archive`` management command.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    message = models.CharField(max_length=255)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.user.username}: {self.message}"
\ No newline at end of file
+        return f"{self.user_id}: {self.message}"
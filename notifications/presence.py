@@ -0,0 +1,208 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+
+PRESENCE_KEY = "presence:connections:{user_id}"
+
+
+def _presence_key(user_id):
+    return PRESENCE_KEY.format(user_id=user_id)
+
+
+class PresenceTracker:
+    """
+    Tracks which users have open websocket connections.
+
+    Every user has a connection counter in the cache, incremented on connect
+    and decremented on disconnect, so a user stays online while any of their
+    tabs is connected. Counters expire ``ttl`` seconds after the last
+    heartbeat, which clears the connections of a crashed process.
+
+    Changes of ``User.is_online`` are not written per connection: they are
+    buffered and flushed with at most two UPDATE statements every
+    ``flush_interval`` seconds.
+    """
+
+    def __init__(self, ttl=None, flush_interval=None):
+        """
+        Initialize the tracker.
+
+        Args:
+            ttl (int, optional): Seconds a counter lives without heartbeat.
+                Defaults to the ``PRESENCE_TTL`` setting.
+            flush_interval (float, optional): Seconds between database
+                flushes. Defaults to the ``PRESENCE_FLUSH_INTERVAL`` setting.
+        """
+        self.ttl = ttl or getattr(settings, "PRESENCE_TTL", 90)
+        self.flush_interval = flush_interval or getattr(
+            settings, "PRESENCE_FLUSH_INTERVAL", 5
+        )
+        self._pending = {}
+        self._flush_task = None
+
+    async def connect(self, user_id):
+        """
+        Register a new connection of a user.
+
+        Args:
+            user_id (int): The id of the user.
+
+        Returns:
+            bool: Whether this is the first open connection of the user.
+        """
+        key = _presence_key(user_id)
+        await cache.aadd(key, 0, self.ttl)
+        try:
+            count = await cache.aincr(key)
+        except ValueError:
+            # The counter expired between add and incr.
+            count = 1
+            await cache.aset(key, count, self.ttl)
+        if count < 1:
+            # Left negative by disconnects of connections the counter had
+            # lost track of; this connection is the only one known.
+            count = 1
+            await cache.aset(key, count, self.ttl)
+        await cache.atouch(key, self.ttl)
+        if count == 1:
+            self._mark(user_id, True)
+        return count == 1
+
+    async def disconnect(self, user_id):
+        """
+        Unregister a connection of a user.
+
+        Args:
+            user_id (int): The id of the user.
+
+        Returns:
+            bool: Whether this was the last open connection of the user.
+        """
+        key = _presence_key(user_id)
+        try:
+            count = await cache.adecr(key)
+        except ValueError:
+            count = 0
+        if count <= 0:
+            # A counter recreated by heartbeat undercounts the open tabs, so
+            # it can drop below zero; never keep it there.
+            await cache.adelete(key)
+            self._mark(user_id, False)
+            return True
+        return False
+
+    async def heartbeat(self, user_id):
+        """
+        Extend the lifetime of the connection counter of a user.
+
+        A counter that has already expired is recreated with one connection.
+
+        Args:
+            user_id (int): The id of the user.
+        """
+        key = _presence_key(user_id)
+        if not await cache.atouch(key, self.ttl):
+            if await cache.aadd(key, 1, self.ttl):
+                self._mark(user_id, True)
+
+    def get_online_user_ids(self, user_ids):
+        """
+        Return the users of ``user_ids`` that have an open connection.
+
+        Args:
+            user_ids (Iterable[int]): The ids of the users to check.
+
+        Returns:
+            set[int]: The ids of the online users.
+        """
+        user_ids = list(user_ids)
+        counts = cache.get_many([_presence_key(user_id) for user_id in user_ids])
+        return {
+            user_id
+            for user_id in user_ids
+            if counts.get(_presence_key(user_id), 0) > 0
+        }
+
+    def _mark(self, user_id, is_online):
+        self._pending[user_id] = is_online
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(
+                self._flush_later()
+            )
+            self._flush_task.add_done_callback(self._flush_cancelled)
+
+    def _take_pending(self):
+        pending, self._pending = self._pending, {}
+        self._flush_task = None
+        return pending
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await sync_to_async(self.flush)(self._take_pending())
+
+    def _flush_cancelled(self, task):
+        """
+        Flushes the pending states of a flush task cancelled before it got
+        to it, e.g. on shutdown, possibly before it even started. The flush
+        runs in the default executor, which ``asyncio.run`` waits for.
+        """
+        if not task.cancelled() or task is not self._flush_task:
+            return
+        pending = self._take_pending()
+        if pending:
+            task.get_loop().run_in_executor(None, self.flush, pending)
+
+    def flush(self, states):
+        """
+        Write online states to the database.
+
+        Users marked offline are checked against the cache first, because
+        they may have connected again through another process.
+
+        Args:
+            states (dict[int, bool]): The new ``is_online`` value per user id.
+        """
+        User = get_user_model()
+        online_ids = [user_id for user_id, is_online in states.items() if is_online]
+        offline_ids = [
+            user_id for user_id, is_online in states.items() if not is_online
+        ]
+        offline_ids = set(offline_ids) - self.get_online_user_ids(offline_ids)
+        if online_ids:
+            User.objects.filter(id__in=online_ids).update(is_online=True)
+        if offline_ids:
+            User.objects.filter(id__in=offline_ids).update(is_online=False)
+
+    def reconcile(self, batch_size=1000):
+        """
+        Mark users without an open connection as offline in the database.
+
+        Corrects ``is_online`` flags left behind by processes that stopped
+        before flushing.
+
+        Args:
+            batch_size (int): The number of users checked per batch.
+
+        Returns:
+            int: The number of users marked offline.
+        """
+        User = get_user_model()
+        online_ids = list(
+            User.objects.filter(is_online=True).values_list("id", flat=True)
+        )
+        updated = 0
+        for start in range(0, len(online_ids), batch_size):
+            batch = online_ids[start:start + batch_size]
+            stale_ids = set(batch) - self.get_online_user_ids(batch)
+            if stale_ids:
+                updated += User.objects.filter(id__in=stale_ids).update(
+                    is_online=False
+                )
+        return updated
+
+
+presence = PresenceTracker()
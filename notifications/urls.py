@@ -1,8 +1,14 @@
 from django.urls import path
-from .views import NotificationListView
+from .views import (
+    NotificationListView,
+    MarkNotificationReadView,
+    MarkNotificationsReadUpToView,
+)
 
 app_name = 'notifications'
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notification_list'),
+    path('<int:pk>/read/', MarkNotificationReadView.as_view(), name='mark_notification_read'),
+    path('read/', MarkNotificationsReadUpToView.as_view(), name='mark_notifications_read'),
 ]
\ No newline at end of file
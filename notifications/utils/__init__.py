@@ -1 +1,4 @@
-from .send_notification import *
\ No newline at end of file
+from .send_notification import *
+from .unread_counter import *
+from .outbox import *
+from .retention import *
@@ -0,0 +1,24 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+
+def dumps(data):
+    """
+    Serialize ``data`` to a JSON string for a websocket text frame.
+
+    Uses orjson when it is installed, which is several times faster than the
+    standard library for the small payloads sent to browsers.
+
+    Args:
+        data: A JSON serializable object.
+
+    Returns:
+        str: The JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(data).decode()
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
@@ -0,0 +1,209 @@
+import asyncio
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.db import connection, transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from notifications.models import Notification, NotificationOutbox
+from notifications.utils.send_notification import NotificationService
+from notifications.utils.unread_counter import increment_unread_counts
+
+
+# Key of the PostgreSQL advisory lock taken while saving notifications.
+NOTIFICATION_INSERT_LOCK = 7301
+
+
+class OutboxDispatcher:
+    """
+    Delivers queued ``NotificationOutbox`` rows in batches.
+
+    Each batch is claimed with ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+    several dispatchers can drain the outbox concurrently. Claiming saves the
+    notifications and leases the rows for ``lease`` seconds; the websocket
+    messages, which carry the notification ids, are only sent once that
+    transaction has committed, so clients never see ids that could still be
+    rolled back. Rows of the same user are coalesced into a single websocket
+    message. Rows whose delivery fails are retried with exponential backoff
+    until ``max_attempts`` is reached; they are then kept in the table for
+    inspection. Rows of a dispatcher that died before finishing are delivered
+    again once their lease expires.
+    """
+
+    def __init__(
+        self,
+        service=None,
+        batch_size=100,
+        max_attempts=5,
+        backoff_base=2,
+        backoff_max=300,
+        lease=60,
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            service (NotificationService, optional): The service used to send
+                websocket messages. Defaults to a new ``NotificationService``.
+            batch_size (int): The maximum number of rows claimed per batch.
+            max_attempts (int): The number of delivery attempts after which
+                a row is no longer retried.
+            backoff_base (int): The base, in seconds, of the exponential
+                retry delay.
+            backoff_max (int): The maximum retry delay, in seconds.
+            lease (int): The time, in seconds, during which claimed rows are
+                not handed to other dispatchers.
+        """
+        self.service = service or NotificationService()
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lease = lease
+
+    def get_retry_delay(self, attempts):
+        """
+        Return the delay before the next delivery attempt.
+
+        Args:
+            attempts (int): The number of failed attempts so far.
+
+        Returns:
+            timedelta: The delay before the row becomes available again.
+        """
+        seconds = min(self.backoff_base**attempts, self.backoff_max)
+        return timedelta(seconds=seconds)
+
+    def dispatch_batch(self):
+        """
+        Claim and deliver one batch of outbox rows.
+
+        Returns:
+            int: The number of claimed rows.
+        """
+        with transaction.atomic():
+            entries = list(
+                NotificationOutbox.objects.select_for_update(skip_locked=True)
+                .filter(
+                    available_at__lte=timezone.now(),
+                    attempts__lt=self.max_attempts,
+                )
+                .order_by("id")[: self.batch_size]
+            )
+            if not entries:
+                return 0
+
+            self._save_notifications(
+                [entry for entry in entries if not entry.is_saved]
+            )
+            available_at = timezone.now() + timedelta(seconds=self.lease)
+            for entry in entries:
+                entry.is_saved = True
+                entry.available_at = available_at
+            NotificationOutbox.objects.bulk_update(
+                entries, ["is_saved", "notification", "available_at"]
+            )
+            transaction.on_commit(lambda: self._deliver(entries))
+        return len(entries)
+
+    def _deliver(self, entries):
+        """
+        Sends the claimed rows, then deletes the delivered ones and schedules
+        the others for a retry.
+        """
+        groups = defaultdict(list)
+        for entry in entries:
+            groups[(entry.user_id, entry.ms_type)].append(entry)
+        errors = async_to_sync(self._send_groups)(groups)
+
+        delivered_ids = [
+            entry.id
+            for key, group in groups.items()
+            if errors[key] is None
+            for entry in group
+        ]
+        with transaction.atomic():
+            NotificationOutbox.objects.filter(id__in=delivered_ids).delete()
+            for key, group in groups.items():
+                if errors[key] is not None:
+                    self._schedule_retry(group, errors[key])
+
+    def _save_notifications(self, entries):
+        if not entries:
+            return
+        if connection.vendor == "postgresql":
+            # Serializes the inserts of concurrent dispatchers until their
+            # commit, so that notification ids become visible in order and a
+            # client's replay cursor does not skip a slower transaction.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT pg_advisory_xact_lock(%s)", [NOTIFICATION_INSERT_LOCK]
+                )
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(user_id=entry.user_id, message=entry.message)
+                for entry in entries
+            ]
+        )
+        for entry, notification in zip(entries, notifications):
+            entry.notification_id = notification.id
+        user_ids = [entry.user_id for entry in entries]
+        transaction.on_commit(lambda: increment_unread_counts(user_ids))
+
+    async def _send_groups(self, groups):
+        keys = list(groups)
+        results = await asyncio.gather(
+            *(self._send_group(key, groups[key]) for key in keys),
+            return_exceptions=True,
+        )
+        return dict(zip(keys, results))
+
+    async def _send_group(self, key, entries):
+        user_id, ms_type = key
+        message_data = {"type": ms_type, "message": entries[-1].message}
+        if entries[-1].notification_id:
+            message_data["id"] = entries[-1].notification_id
+        if len(entries) > 1:
+            message_data["messages"] = [entry.message for entry in entries]
+            message_data["ids"] = [entry.notification_id for entry in entries]
+        await self.service.asend_websocket_notification(
+            f"notifications_{user_id}", message_data
+        )
+
+    def _schedule_retry(self, entries, error):
+        attempts = max(entry.attempts for entry in entries) + 1
+        available_at = timezone.now() + self.get_retry_delay(attempts)
+        for entry in entries:
+            entry.attempts += 1
+            entry.available_at = available_at
+            entry.last_error = repr(error)
+        # The rows are leased by dispatch_batch. The attempts differ per
+        # row, hence bulk_update instead of update.
+        NotificationOutbox.objects.bulk_update(
+            entries, ["attempts", "available_at", "last_error"]
+        )
+
+    def get_stats(self):
+        """
+        Return the queue depth metrics of the outbox.
+
+        Returns:
+            dict: ``depth`` (all rows), ``ready`` (deliverable now),
+            ``delayed`` (waiting for a retry), ``failed`` (out of attempts)
+            and ``oldest_age`` (age of the oldest row, in seconds).
+        """
+        now = timezone.now()
+        stats = NotificationOutbox.objects.aggregate(
+            depth=Count("id"),
+            ready=Count(
+                "id", filter=Q(available_at__lte=now, attempts__lt=self.max_attempts)
+            ),
+            failed=Count("id", filter=Q(attempts__gte=self.max_attempts)),
+            oldest=Min("created_at"),
+        )
+        oldest = stats.pop("oldest")
+        stats["delayed"] = stats["depth"] - stats["ready"] - stats["failed"]
+        stats["oldest_age"] = (now - oldest).total_seconds() if oldest else 0
+        return stats
@@ -0,0 +1,65 @@
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from notifications.models import Notification, NotificationArchive
+
+
+def prune_read_notifications(days, batch_size=1000, archive=False, sleep=0):
+    """
+    Delete, or move to ``NotificationArchive``, the read notifications older
+    than ``days`` days.
+
+    Rows are processed in short transactions of at most ``batch_size`` rows,
+    walking the primary key, so no long lock is held on the table and other
+    writers can interleave between batches. Unread notifications are never
+    touched, so the cached unread counters stay valid.
+
+    Args:
+        days (int): The age, in days, after which read notifications are
+            pruned.
+        batch_size (int): The maximum number of rows deleted per transaction.
+        archive (bool): Whether to copy the rows to ``NotificationArchive``
+            before deleting them.
+        sleep (float): Seconds to wait between batches, to limit the load on
+            the database.
+
+    Returns:
+        int: The number of pruned notifications.
+    """
+    cutoff = timezone.now() - timedelta(days=days)
+    queryset = Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+    last_id = 0
+    total = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                queryset.select_for_update()
+                .filter(id__gt=last_id)
+                .order_by("id")
+                .values("id", "user_id", "message", "created_at")[:batch_size]
+            )
+            if not rows:
+                break
+            if archive:
+                NotificationArchive.objects.bulk_create(
+                    [
+                        NotificationArchive(
+                            user_id=row["user_id"],
+                            message=row["message"],
+                            created_at=row["created_at"],
+                        )
+                        for row in rows
+                    ]
+                )
+            total += Notification.objects.filter(
+                id__in=[row["id"] for row in rows]
+            ).delete()[0]
+        last_id = rows[-1]["id"]
+        if len(rows) < batch_size:
+            break
+        if sleep:
+            time.sleep(sleep)
+    return total
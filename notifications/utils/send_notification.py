@@ -1,12 +1,43 @@
+import asyncio
+
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
-from notifications.models import Notification
+from django.db import transaction
+from monitoring.metrics import registry
+from notifications.models import Notification, NotificationOutbox
+from notifications.utils.unread_counter import (
+    aincrement_unread_counts,
+    increment_unread_counts,
+)
+
+
+SEND_LATENCY = registry.histogram(
+    "dms_channel_layer_send_duration_seconds",
+    "Time spent in channel layer group_send, by event type.",
+    ["type"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+SENT = registry.counter(
+    "dms_notifications_sent_total",
+    "Notifications sent to websocket groups, by event type.",
+    ["type"],
+)
+SEND_ERRORS = registry.counter(
+    "dms_channel_layer_send_errors_total",
+    "Failed channel layer group_send calls, by event type and exception.",
+    ["type", "error"],
+)
 
 
 class NotificationService:
     """
     Service for creating and sending notifications to users.
+
+    Every public method has an async counterpart prefixed with ``a``
+    (``anotify_user``, ``anotify_many``, ...) which uses the async ORM and
+    awaits the channel layer directly. Async callers such as consumers
+    should use those instead of the blocking sync methods.
     """
 
     def __init__(self, channel_layer=None):
@@ -35,11 +66,70 @@ class NotificationService:
         """
         User = get_user_model()
         user = User.objects.get(id=user_id)
-        return Notification.objects.create(
+        notification = Notification.objects.create(
             user=user,
             message=message,
             is_read=is_read,
         )
+        if not is_read:
+            transaction.on_commit(lambda: increment_unread_counts([user_id]))
+        return notification
+
+    def create_notifications(self, user_ids, message: str, is_read=False):
+        """
+        Create the same notification for several users with a single INSERT.
+
+        The users are referenced by id only, so no user rows are fetched.
+
+        Args:
+            user_ids (Iterable[int]): The ids of the users to notify.
+            message (str): The message for the notifications.
+            is_read (bool): Whether the notifications are read or not.
+
+        Returns:
+            list[Notification]: The created notifications.
+        """
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(user_id=user_id, message=message, is_read=is_read)
+                for user_id in user_ids
+            ]
+        )
+        if not is_read:
+            recipient_ids = [notification.user_id for notification in notifications]
+            transaction.on_commit(lambda: increment_unread_counts(recipient_ids))
+        return notifications
+
+    async def acreate_notification(self, user_id: int, message: str, is_read=False):
+        """
+        Async version of :meth:`create_notification`.
+
+        The user is referenced by id only, so no user row is fetched.
+        """
+        notification = await Notification.objects.acreate(
+            user_id=user_id,
+            message=message,
+            is_read=is_read,
+        )
+        if not is_read:
+            await aincrement_unread_counts([user_id])
+        return notification
+
+    async def acreate_notifications(self, user_ids, message: str, is_read=False):
+        """
+        Async version of :meth:`create_notifications`.
+        """
+        notifications = await Notification.objects.abulk_create(
+            [
+                Notification(user_id=user_id, message=message, is_read=is_read)
+                for user_id in user_ids
+            ]
+        )
+        if not is_read:
+            await aincrement_unread_counts(
+                [notification.user_id for notification in notifications]
+            )
+        return notifications
 
     def send_websocket_notification(self, group_name: str, message_data: dict):
         """
@@ -49,7 +139,69 @@ class NotificationService:
             group_name (str): The name of the group to send the message to.
             message_data (dict): The data to send in the message.
         """
-        async_to_sync(self.channel_layer.group_send)(group_name, message_data)
+        async_to_sync(self._group_send)(group_name, message_data)
+
+    def send_websocket_notifications(self, group_names, message_data: dict):
+        """
+        Send the same websocket message to several groups.
+
+        All sends are issued concurrently inside a single event loop, instead
+        of starting one ``async_to_sync`` round trip per group.
+
+        Args:
+            group_names (Iterable[str]): The names of the groups to send to.
+            message_data (dict): The data to send in the message.
+        """
+        async_to_sync(self.asend_websocket_notifications)(group_names, message_data)
+
+    async def asend_websocket_notification(self, group_name: str, message_data: dict):
+        """
+        Async version of :meth:`send_websocket_notification`.
+        """
+        await self._group_send(group_name, message_data)
+
+    async def asend_websocket_notifications(self, group_names, message_data: dict):
+        """
+        Async version of :meth:`send_websocket_notifications`.
+        """
+        await self.asend_websocket_messages(
+            {group_name: message_data for group_name in group_names}
+        )
+
+    def send_websocket_messages(self, messages):
+        """
+        Send a different websocket message to each group, concurrently
+        inside a single event loop.
+
+        Args:
+            messages (dict[str, dict]): The data to send, keyed by group name.
+        """
+        async_to_sync(self.asend_websocket_messages)(messages)
+
+    async def asend_websocket_messages(self, messages):
+        """
+        Async version of :meth:`send_websocket_messages`.
+        """
+        await asyncio.gather(
+            *(
+                self._group_send(group_name, message_data)
+                for group_name, message_data in messages.items()
+            )
+        )
+
+    async def _group_send(self, group_name, message_data):
+        """
+        Sends a message to a group, recording the latency and the errors of
+        the channel layer and the number of sent notifications.
+        """
+        ms_type = message_data.get("type", "")
+        try:
+            with SEND_LATENCY.time(type=ms_type):
+                await self.channel_layer.group_send(group_name, message_data)
+        except Exception as error:
+            SEND_ERRORS.inc(type=ms_type, error=type(error).__name__)
+            raise
+        SENT.inc(len(message_data.get("messages", ())) or 1, type=ms_type)
 
     def notify_user(
         self,
@@ -72,11 +224,168 @@ class NotificationService:
             send_to_ws (bool): Whether to send the notification over the websocket.
                 Defaults to True.
         """
+        message_data = {"type": ms_type, "message": message}
         if save_to_db:
-            self.create_notification(user_id, message)
+            message_data["id"] = self.create_notification(user_id, message).id
         if send_to_ws:
             self.send_websocket_notification(
                 group_name=f"notifications_{user_id}",
-                message_data={"type": ms_type, "message": message},
+                message_data=message_data,
+            )
+
+    def notify_many(
+        self,
+        user_ids,
+        message: str,
+        ms_type: str = "send_notification",
+        save_to_db=True,
+        send_to_ws=True,
+    ):
+        """
+        Notify several users with the same message.
+
+        Costs one INSERT for all notifications and one batch of channel layer
+        sends, regardless of the number of recipients.
+
+        Args:
+            user_ids (Iterable[int]): The ids of the users to notify.
+                Duplicates are ignored.
+            message (str): The message for the notifications.
+            ms_type (str): The type of message to send. Defaults to
+                "send_notification".
+            save_to_db (bool): Whether to save the notifications to the
+                database. Defaults to True.
+            send_to_ws (bool): Whether to send the notifications over the
+                websocket. Defaults to True.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return
+        ids = {}
+        if save_to_db:
+            notifications = self.create_notifications(user_ids, message)
+            ids = {notification.user_id: notification.id for notification in notifications}
+        if send_to_ws:
+            self.send_websocket_messages(
+                self._get_messages(user_ids, ids, message, ms_type)
+            )
+
+    async def anotify_user(
+        self,
+        user_id: int,
+        message: str,
+        ms_type: str = "send_notification",
+        save_to_db=True,
+        send_to_ws=True,
+    ):
+        """
+        Async version of :meth:`notify_user`.
+        """
+        message_data = {"type": ms_type, "message": message}
+        if save_to_db:
+            notification = await self.acreate_notification(user_id, message)
+            message_data["id"] = notification.id
+        if send_to_ws:
+            await self.asend_websocket_notification(
+                group_name=f"notifications_{user_id}",
+                message_data=message_data,
+            )
+
+    async def anotify_many(
+        self,
+        user_ids,
+        message: str,
+        ms_type: str = "send_notification",
+        save_to_db=True,
+        send_to_ws=True,
+    ):
+        """
+        Async version of :meth:`notify_many`.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return
+        ids = {}
+        if save_to_db:
+            notifications = await self.acreate_notifications(user_ids, message)
+            ids = {notification.user_id: notification.id for notification in notifications}
+        if send_to_ws:
+            await self.asend_websocket_messages(
+                self._get_messages(user_ids, ids, message, ms_type)
             )
 
+    @staticmethod
+    def _get_messages(user_ids, ids, message, ms_type):
+        """
+        Build the websocket message of each user, with the id of the saved
+        notification when there is one.
+        """
+        messages = {}
+        for user_id in user_ids:
+            message_data = {"type": ms_type, "message": message}
+            if user_id in ids:
+                message_data["id"] = ids[user_id]
+            messages[f"notifications_{user_id}"] = message_data
+        return messages
+
+    def enqueue(self, user_id: int, message: str, ms_type: str = "send_notification"):
+        """
+        Queue a notification for a user in the outbox.
+
+        Only the outbox row is written; the notification is saved and sent
+        later by the outbox dispatcher. Called inside ``transaction.atomic``
+        the notification is delivered only if the transaction commits.
+
+        Args:
+            user_id (int): The id of the user to notify.
+            message (str): The message for the notification.
+            ms_type (str): The type of message to send. Defaults to
+                "send_notification".
+
+        Returns:
+            NotificationOutbox: The queued outbox row.
+        """
+        return NotificationOutbox.objects.create(
+            user_id=user_id, message=message, ms_type=ms_type
+        )
+
+    def enqueue_many(self, user_ids, message: str, ms_type: str = "send_notification"):
+        """
+        Queue the same notification for several users with a single INSERT.
+
+        Args:
+            user_ids (Iterable[int]): The ids of the users to notify.
+                Duplicates are ignored.
+            message (str): The message for the notifications.
+            ms_type (str): The type of message to send. Defaults to
+                "send_notification".
+
+        Returns:
+            list[NotificationOutbox]: The queued outbox rows.
+        """
+        return NotificationOutbox.objects.bulk_create(
+            [
+                NotificationOutbox(user_id=user_id, message=message, ms_type=ms_type)
+                for user_id in dict.fromkeys(user_ids)
+            ]
+        )
+
+    def enqueue_each(self, messages, ms_type: str = "send_notification"):
+        """
+        Queue a different notification for each user with a single INSERT.
+
+        Args:
+            messages (dict[int, str]): The message to send to each user,
+                keyed by user id.
+            ms_type (str): The type of message to send. Defaults to
+                "send_notification".
+
+        Returns:
+            list[NotificationOutbox]: The queued outbox rows.
+        """
+        return NotificationOutbox.objects.bulk_create(
+            [
+                NotificationOutbox(user_id=user_id, message=message, ms_type=ms_type)
+                for user_id, message in messages.items()
+            ]
+        )
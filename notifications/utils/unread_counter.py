@@ -0,0 +1,116 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from notifications.models import Notification
+
+
+UNREAD_COUNT_KEY = "notifications:unread:{user_id}"
+
+
+def _unread_count_key(user_id):
+    return UNREAD_COUNT_KEY.format(user_id=user_id)
+
+
+def _unread_count_timeout():
+    return getattr(settings, "NOTIFICATIONS_UNREAD_COUNT_TIMEOUT", 24 * 60 * 60)
+
+
+def count_unread_notifications(user_id):
+    """
+    Count the unread notifications of a user in the database.
+
+    Args:
+        user_id (int): The id of the user.
+
+    Returns:
+        int: The number of unread notifications.
+    """
+    return Notification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+def get_unread_count(user_id):
+    """
+    Return the unread notifications counter of a user.
+
+    The counter is served from the cache. On a cache miss it is recomputed
+    from the database once and stored again.
+
+    Args:
+        user_id (int): The id of the user.
+
+    Returns:
+        int: The number of unread notifications.
+    """
+    key = _unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = count_unread_notifications(user_id)
+        cache.add(key, count, _unread_count_timeout())
+    return count
+
+
+def increment_unread_counts(user_ids, delta=1):
+    """
+    Increment the unread counters of several users.
+
+    Counters missing from the cache are left alone: they are recomputed from
+    the database on the next read.
+
+    Args:
+        user_ids (Iterable[int]): The ids of the users.
+        delta (int): The value to add to each counter.
+    """
+    for user_id in user_ids:
+        try:
+            cache.incr(_unread_count_key(user_id), delta)
+        except ValueError:
+            pass
+
+
+async def aincrement_unread_counts(user_ids, delta=1):
+    """
+    Async version of :func:`increment_unread_counts`.
+    """
+    for user_id in user_ids:
+        try:
+            await cache.aincr(_unread_count_key(user_id), delta)
+        except ValueError:
+            pass
+
+
+def reset_unread_count(user_id):
+    """
+    Set the unread counter of a user to zero.
+
+    Args:
+        user_id (int): The id of the user.
+    """
+    cache.set(_unread_count_key(user_id), 0, _unread_count_timeout())
+
+
+def reconcile_unread_counts(user_ids):
+    """
+    Overwrite the cached unread counters of the given users with the values
+    stored in the database, using one aggregated query.
+
+    Args:
+        user_ids (Iterable[int]): The ids of the users.
+
+    Returns:
+        int: The number of counters that were written.
+    """
+    user_ids = list(user_ids)
+    counts = dict(
+        Notification.objects.filter(user_id__in=user_ids, is_read=False)
+        .values_list("user_id")
+        .annotate(unread=Count("id"))
+    )
+    cache.set_many(
+        {
+            _unread_count_key(user_id): counts.get(user_id, 0)
+            for user_id in user_ids
+        },
+        _unread_count_timeout(),
+    )
+    return len(user_ids)
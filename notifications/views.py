@@ -1,18 +1,21 @@
 from django.shortcuts import redirect
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views import View
 from django.views.generic import ListView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
+from common.pagination import KeysetPaginationMixin
 from notifications.models import Notification
+from notifications.utils import increment_unread_counts, reset_unread_count
 
 
-
-
-
-
-class NotificationListView(LoginRequiredMixin, ListView):
+class NotificationListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     """
     View for listing user notifications. Inherits from LoginRequiredMixin and ListView.
 
+    Notifications are paginated newest first with a cursor on the id, so every
+    page costs the same regardless of the size of the inbox.
+
     Attributes:
         model (Notification): The model for the view.
         template_name (str): The template to render.
@@ -21,6 +24,8 @@ class NotificationListView(LoginRequiredMixin, ListView):
     model = Notification
     template_name = 'notifications/notification_list.html'
     context_object_name = 'notifications'
+    paginate_by = 20
+    keyset_fields = ('id',)
 
     def get_queryset(self):
         """
@@ -45,4 +50,50 @@ class NotificationListView(LoginRequiredMixin, ListView):
             HttpResponseRedirect: Redirects to the notification list view.
         """
         self.request.user.notifications.filter(is_read=False).update(is_read=True)
+        reset_unread_count(self.request.user.id)
         return redirect('notifications:notification_list')
+
+
+def redirect_back(request):
+    """
+    Redirects to the page given in the ``next`` parameter, which keeps the
+    current inbox page, or to the notification list.
+    """
+    next_url = request.POST.get('next')
+    if next_url and url_has_allowed_host_and_scheme(
+        next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+    ):
+        return redirect(next_url)
+    return redirect('notifications:notification_list')
+
+
+class MarkNotificationReadView(LoginRequiredMixin, View):
+    """
+    Marks a single notification of the current user as read with one UPDATE.
+    """
+
+    def post(self, request, pk):
+        updated = Notification.objects.filter(
+            pk=pk, user=request.user, is_read=False
+        ).update(is_read=True)
+        if updated:
+            increment_unread_counts([request.user.id], -updated)
+        return redirect_back(request)
+
+
+class MarkNotificationsReadUpToView(LoginRequiredMixin, View):
+    """
+    Marks the notifications of the current user with an id up to the
+    ``up_to`` parameter as read with one UPDATE, e.g. everything older than
+    the newest notification on the page.
+    """
+
+    def post(self, request):
+        up_to = request.POST.get('up_to', '')
+        if up_to.isdigit():
+            updated = Notification.objects.filter(
+                user=request.user, is_read=False, id__lte=int(up_to)
+            ).update(is_read=True)
+            if updated:
+                increment_unread_counts([request.user.id], -updated)
+        return redirect_back(request)
@@ -1,7 +1,11 @@
+from collections import defaultdict
+
 from django.utils.html import format_html
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.db import transaction
 from users.models import RoleRequest, User
+from users.services import review_role_requests
 
 
 class CustomUserAdmin(UserAdmin):
@@ -88,15 +92,38 @@ class RoleRequestAdmin(admin.ModelAdmin):
     list_editable = ["is_approved"]
 
     def approve_requests(self, request, queryset):
-        for role_request in queryset:
-            role_request.user.role = role_request.requested_role
-            role_request.user.save()
-            role_request.is_approved = True
-            role_request.save()
+        count = review_role_requests(queryset.values_list("id", flat=True), True)
+        self.message_user(request, f"Одобрено запросов: {count}.")
 
     approve_requests.short_description = "Одобрить выбранные запросы"
 
     def reject_requests(self, request, queryset):
-        queryset.update(is_approved=False)
+        count = review_role_requests(queryset.values_list("id", flat=True), False)
+        self.message_user(request, f"Отклонено запросов: {count}.")
 
     reject_requests.short_description = "Отклонить выбранные запросы"
+
+    def changelist_view(self, request, extra_context=None):
+        """
+        Applies the ``is_approved`` changes made in the list with
+        ``review_role_requests``, in the transaction of the list save.
+        """
+        if request.method != "POST" or "_save" not in request.POST:
+            return super().changelist_view(request, extra_context)
+        request.role_request_reviews = defaultdict(list)
+        with transaction.atomic():
+            response = super().changelist_view(request, extra_context)
+            for is_approved, request_ids in request.role_request_reviews.items():
+                if is_approved is None:
+                    RoleRequest.objects.filter(id__in=request_ids).update(is_approved=None)
+                else:
+                    review_role_requests(request_ids, is_approved)
+        return response
+
+    def save_model(self, request, obj, form, change):
+        reviews = getattr(request, "role_request_reviews", None)
+        if reviews is not None and change and form.changed_data == ["is_approved"]:
+            # Saved in bulk by changelist_view.
+            reviews[obj.is_approved].append(obj.pk)
+            return
+        super().save_model(request, obj, form, change)
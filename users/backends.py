@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def _user_cache_key(user_id):
+    return f"users:user:{user_id}"
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drop the cached user so the next request loads it from the database.
+
+    Called on every ``User`` save by ``users.signals``; code changing users
+    with ``QuerySet.update`` must call it itself.
+
+    Args:
+        user_id (int): The id of the user.
+    """
+    cache.delete(_user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` keeping the users loaded by ``get_user`` in the cache
+    for ``AUTH_USER_CACHE_TIMEOUT`` seconds.
+
+    ``get_user`` runs on every authenticated HTTP request and websocket
+    handshake. Together with the ``cached_db`` session engine it lets them
+    skip both the session and the user query.
+    """
+
+    def get_user(self, user_id):
+        timeout = getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 0)
+        if not timeout:
+            return super().get_user(user_id)
+        key = _user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, user, timeout)
+        return user if self.user_can_authenticate(user) else None
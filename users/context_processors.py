@@ -1,12 +1,10 @@
 
-
-
-
+from notifications.utils import get_unread_count
 
 
 def unread_notifications(request):
     if request.user.is_authenticated:
-        unread_count = request.user.notifications.filter(is_read=False).count()
+        unread_count = get_unread_count(request.user.id)
     else:
         unread_count = 0
     return {'unread_notifications_count': unread_count}
\ No newline at end of file
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from users.backends import invalidate_cached_user
+
+
+BASELINE_SETTINGS = {
+    "SESSION_ENGINE": "django.contrib.sessions.backends.db",
+    "AUTHENTICATION_BACKENDS": ["django.contrib.auth.backends.ModelBackend"],
+}
+
+
+class Command(BaseCommand):
+    """
+    Compare the number of queries per authenticated request with database
+    sessions and the configured session engine and authentication backends.
+
+    Requests are made in-process with the test client as an existing user;
+    a session is created for it for each configuration.
+    """
+
+    help = "Измеряет количество SQL-запросов на аутентифицированный запрос."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="The user to make the requests as.")
+        parser.add_argument("--path", default="/", help="The URL to request.")
+        parser.add_argument("--requests", type=int, default=10)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist.")
+
+        hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+        with override_settings(ALLOWED_HOSTS=hosts, **BASELINE_SETTINGS):
+            baseline = self.measure(user, options["path"], options["requests"])
+        with override_settings(ALLOWED_HOSTS=hosts):
+            cached = self.measure(user, options["path"], options["requests"])
+
+        self.stdout.write(
+            f"{'':24}{'first':>8}{'average':>10}\n"
+            f"{'db sessions':24}{baseline[0]:>8}{baseline[1]:>10.1f}\n"
+            f"{'configured':24}{cached[0]:>8}{cached[1]:>10.1f}"
+        )
+
+    def measure(self, user, path, requests):
+        """
+        Returns the number of queries of the first request after logging in
+        and the average over the following ones.
+        """
+        client = Client()
+        client.force_login(user)
+        invalidate_cached_user(user.pk)
+        counts = []
+        for _ in range(requests + 1):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path)
+            if response.status_code >= 400:
+                raise CommandError(f"GET {path} returned {response.status_code}.")
+            counts.append(len(queries))
+        client.logout()
+        return counts[0], sum(counts[1:]) / requests
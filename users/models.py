@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from common.tracking import TrackChangesMixin
+
 
 class User(AbstractUser):
     ROLE_EMPLOYEE = "employee"
@@ -31,7 +33,9 @@ class User(AbstractUser):
         return self.role == self.ROLE_ASSISTANT
 
 
-class RoleRequest(models.Model):
+class RoleRequest(TrackChangesMixin, models.Model):
+    tracked_fields = ("is_approved",)
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=True)
     requested_role = models.CharField(max_length=10, choices=User.ROLE_CHOICES, db_index=True)
     is_approved = models.BooleanField(null=True, blank=True, db_index=True)
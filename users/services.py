@@ -0,0 +1,77 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from notifications.utils import NotificationService
+from users.backends import invalidate_cached_user
+from users.models import RoleRequest, User
+
+
+ROLE_REQUEST_MESSAGES = {
+    True: "Ваш запрос на изменение роли на «{role}» был <<одобрен>>.",
+    False: "Ваш запрос на изменение роли на «{role}» был <<отклонен>>.",
+}
+
+
+def review_role_requests(request_ids, is_approved, service=None):
+    """
+    Approves or rejects several role requests in one transaction.
+
+    Runs one UPDATE for the requests and, on approval, one UPDATE of
+    ``User.role`` per granted role, instead of saving every row. Requests
+    already in the target state are skipped. When a user has several
+    approved requests, the most recent one wins.
+
+    ``QuerySet.update`` sends no signals, so the cached users are dropped
+    here and the notifications are queued with a single INSERT.
+
+    Args:
+        request_ids (Iterable[int]): The ids of the role requests.
+        is_approved (bool): Whether to approve or reject the requests.
+        service (NotificationService, optional): The service used to queue
+            the notifications.
+
+    Returns:
+        int: The number of reviewed requests.
+    """
+    service = service or NotificationService()
+    with transaction.atomic():
+        role_requests = list(
+            RoleRequest.objects.select_for_update()
+            .filter(id__in=request_ids)
+            .exclude(is_approved=is_approved)
+            .order_by("created_at", "id")
+            .only("id", "user_id", "requested_role")
+        )
+        if not role_requests:
+            return 0
+        RoleRequest.objects.filter(
+            id__in=[role_request.id for role_request in role_requests]
+        ).update(is_approved=is_approved)
+
+        messages = {}
+        roles = {}
+        for role_request in role_requests:
+            messages[role_request.user_id] = ROLE_REQUEST_MESSAGES[is_approved].format(
+                role=role_request.get_requested_role_display()
+            )
+            roles[role_request.user_id] = role_request.requested_role
+
+        if is_approved:
+            user_ids_by_role = defaultdict(list)
+            for user_id, role in roles.items():
+                user_ids_by_role[role].append(user_id)
+            for role, user_ids in sorted(user_ids_by_role.items()):
+                User.objects.filter(id__in=user_ids).update(role=role)
+            user_ids = list(roles)
+
+            def invalidate():
+                for user_id in user_ids:
+                    invalidate_cached_user(user_id)
+
+            # Again after the commit, as in users.signals.
+            invalidate()
+            transaction.on_commit(invalidate)
+
+        service.enqueue_each(messages)
+    return len(role_requests)
@@ -1,48 +1,52 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from users.backends import invalidate_cached_user
 from users.models import RoleRequest, User
+from users.services import ROLE_REQUEST_MESSAGES
 from notifications.utils import NotificationService
 
 notification_sender = NotificationService()
 
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """
+    Drop the user cached by ``CachedModelBackend`` when it changes, e.g. when
+    a role request is approved or the profile is edited.
+
+    The entry is dropped again after the commit, in case a concurrent request
+    cached the old row in the meantime.
+    """
+    user_id = instance.pk
+    invalidate_cached_user(user_id)
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
+
 @receiver(post_save, sender=RoleRequest)
 def notify_admins_on_role_request(sender, instance, created, **kwargs):
     """
     Notify all superusers about new role request.
     """
     if created:
-        admins = User.objects.filter(is_superuser=True)
+        admin_ids = User.objects.filter(is_superuser=True).values_list("id", flat=True)
         message = f"Пользователь {instance.user.username} запрашивает изменение роли на {instance.get_requested_role_display()}."
-        for admin in admins:
-            notification_sender.notify_user(admin.id, message)
-
-@receiver(pre_save, sender=RoleRequest)
-def save_old_is_approved(sender, instance, **kwargs):
-    """
-    Save old value of is_approved field to be able to check if it has changed.
-    """
-    if instance.pk:
-        try:
-            instance._old_is_approved = RoleRequest.objects.get(pk=instance.pk).is_approved
-        except RoleRequest.DoesNotExist:
-            instance._old_is_approved = None
-    else:
-        instance._old_is_approved = None
+        notification_sender.notify_many(admin_ids, message)
 
 @receiver(post_save, sender=RoleRequest)
 def notify_user_on_role_request_update(sender, instance, **kwargs):
     """
     Notify user about role request update results.
+
+    The previous ``is_approved`` comes from the values tracked by
+    ``TrackChangesMixin``, so no query is needed to detect the change.
     """
-    if hasattr(instance, "_old_is_approved"):
-        old_is_approved = instance._old_is_approved
-        new_is_approved = instance.is_approved
-        if old_is_approved != new_is_approved and new_is_approved is not None:
-            if new_is_approved:
-                message = f"Ваш запрос на изменение роли на «{instance.get_requested_role_display()}» был <<одобрен>>."
-                user = instance.user
-                user.role = instance.requested_role
-                user.save()
-            else:
-                message = f"Ваш запрос на изменение роли на «{instance.get_requested_role_display()}» был <<отклонен>>."
-            notification_sender.notify_user(instance.user.id, message)
+    new_is_approved = instance.is_approved
+    if instance.has_changed("is_approved") and new_is_approved is not None:
+        message = ROLE_REQUEST_MESSAGES[new_is_approved].format(
+            role=instance.get_requested_role_display()
+        )
+        if new_is_approved:
+            user = instance.user
+            user.role = instance.requested_role
+            user.save()
+        notification_sender.notify_user(instance.user_id, message)